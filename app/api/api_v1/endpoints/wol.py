@@ -7,15 +7,12 @@ from typing import List
 import structlog
 
 from app.models.host import WOLRequest, WOLResponse, HostResponse
-from app.services.wol_service import WOLService
+from app.services.wol_service import wol_service
 from app.core.redis_client import redis_client
 
 logger = structlog.get_logger(__name__)
 router = APIRouter()
 
-# Initialize WOL service
-wol_service = WOLService()
-
 
 @router.post("/wake", response_model=WOLResponse)
 async def wake_host(request: WOLRequest):
@@ -21,15 +21,19 @@ class Settings(BaseSettings):
     
     # Discovery settings
     DISCOVERY_INTERVAL: int = 300  # seconds
+    DISCOVERY_MAX_INTERVAL: int = 3600  # seconds; upper bound while the network is stable
+    DISCOVERY_BACKOFF_STABLE_CYCLES: int = 3  # unchanged cycles before the interval starts doubling
     NETWORK_RANGE: str = "192.168.1.0/24"
     DISCOVERY_EARLY_TERMINATION: bool = True  # Stop discovery when high-priority methods succeed
     DISCOVERY_MIN_HOSTS_THRESHOLD: int = 5  # Minimum hosts to trigger early termination
+    DISCOVERY_METHOD_TIMEOUT: int = 120  # seconds before a single discovery method is abandoned
     
     # RouterOS settings
     ROUTEROS_HOST: Optional[str] = None
     ROUTEROS_USERNAME: Optional[str] = None
     ROUTEROS_PASSWORD: Optional[str] = None
     ROUTEROS_PORT: int = 8728
+    ROUTEROS_API_IDLE_TIMEOUT: int = 600  # seconds before an unused API session is closed
     
     # SNMP settings
     SNMP_COMMUNITY: str = "public"
@@ -38,6 +42,7 @@ class Settings(BaseSettings):
     # WOL settings
     WOL_BROADCAST_ADDRESS: str = "192.168.1.255"
     WOL_PORT: int = 9
+    WOL_MAC_CACHE_TTL: int = 60  # seconds to reuse an IP -> MAC lookup before asking Redis again
     
     # Security
     SECRET_KEY: str = "your-secret-key-change-in-production"
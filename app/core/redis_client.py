@@ -47,14 +47,7 @@ class RedisClient:
         """Store host information"""
         try:
             host_key = f"host:{host_data['ip_address']}"
-            
-            # Convert None values to empty strings for Redis
-            cleaned_data = {}
-            for key, value in host_data.items():
-                if value is None:
-                    cleaned_data[key] = ""
-                else:
-                    cleaned_data[key] = str(value)
+            cleaned_data = self._encode_host(host_data)
             
             logger.debug("Storing host data", ip=host_data['ip_address'], keys=list(cleaned_data.keys()))
             await self.redis.hset(host_key, mapping=cleaned_data)
@@ -76,38 +69,7 @@ class RedisClient:
             if not host_data:
                 return None
             
-            # Convert empty strings back to None for optional fields
-            cleaned_data = {}
-            optional_fields = {'hostname', 'vendor', 'device_type', 'os_info', 'notes', 'inferred_os', 'inferred_device_type'}
-            
-            for key, value in host_data.items():
-                if key in optional_fields and value == "":
-                    cleaned_data[key] = None
-                elif key == 'wol_enabled':
-                    # Convert string back to boolean
-                    cleaned_data[key] = value.lower() == 'true'
-                elif key == 'status':
-                    # Handle status enum conversion
-                    if value.startswith('HostStatus.'):
-                        cleaned_data[key] = value.split('.', 1)[1].lower()
-                    else:
-                        cleaned_data[key] = value
-                elif key == 'discovery_method':
-                    # Handle discovery method enum conversion
-                    if value.startswith('DiscoveryMethod.'):
-                        cleaned_data[key] = value.split('.', 1)[1].lower()
-                    else:
-                        cleaned_data[key] = value
-                elif key == 'inference_confidence':
-                    # Convert string back to integer
-                    try:
-                        cleaned_data[key] = int(value) if value else None
-                    except ValueError:
-                        cleaned_data[key] = None
-                else:
-                    cleaned_data[key] = value
-            
-            return cleaned_data
+            return self._decode_host(host_data)
         except Exception as e:
             logger.error("Failed to get host", error=str(e), ip=ip_address)
             return None
@@ -179,101 +141,188 @@ class RedisClient:
                 # No existing data, store new data directly
                 return await self.set_host(new_host_data)
             
-            # Convert existing data back to proper types
-            existing_host = await self.get_host(ip_address)
-            if not existing_host:
-                return await self.set_host(new_host_data)
+            merged_data = self._resolve_merge(ip_address, self._decode_host(existing_data), new_host_data)
+            if merged_data is not None:
+                return await self.set_host(merged_data)
+            return True
+                
+        except Exception as e:
+            logger.error("Failed to merge host data", error=str(e), ip=ip_address)
+            return False
+    
+    def _encode_host(self, host_data: Dict[str, Any]) -> Dict[str, str]:
+        """Convert host data to a Redis hash mapping (None becomes an empty string)"""
+        cleaned_data = {}
+        for key, value in host_data.items():
+            if value is None:
+                cleaned_data[key] = ""
+            else:
+                cleaned_data[key] = str(value)
+        return cleaned_data
+    
+    def _decode_host(self, host_data: Dict[str, str]) -> Dict[str, Any]:
+        """Convert a Redis hash back to typed host data"""
+        # Convert empty strings back to None for optional fields
+        cleaned_data = {}
+        optional_fields = {'hostname', 'vendor', 'device_type', 'os_info', 'notes', 'inferred_os', 'inferred_device_type'}
+        
+        for key, value in host_data.items():
+            if key in optional_fields and value == "":
+                cleaned_data[key] = None
+            elif key == 'wol_enabled':
+                # Convert string back to boolean
+                cleaned_data[key] = value.lower() == 'true'
+            elif key == 'status':
+                # Handle status enum conversion
+                if value.startswith('HostStatus.'):
+                    cleaned_data[key] = value.split('.', 1)[1].lower()
+                else:
+                    cleaned_data[key] = value
+            elif key == 'discovery_method':
+                # Handle discovery method enum conversion
+                if value.startswith('DiscoveryMethod.'):
+                    cleaned_data[key] = value.split('.', 1)[1].lower()
+                else:
+                    cleaned_data[key] = value
+            elif key == 'inference_confidence':
+                # Convert string back to integer
+                try:
+                    cleaned_data[key] = int(value) if value else None
+                except ValueError:
+                    cleaned_data[key] = None
+            else:
+                cleaned_data[key] = value
+        return cleaned_data
+    
+    def _resolve_merge(self, ip_address: str, existing_host: Dict[str, Any],
+                       new_host_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Quality-aware merge of new host data into existing data; None if nothing changes"""
+        # Import here to avoid circular imports
+        from app.services.data_quality import DataQualityScorer
+        from app.models.host import Host
+        
+        # Create Host objects for comparison
+        existing_host_obj = Host(**existing_host)
+        new_host_obj = Host(**new_host_data)
+        
+        # Score both hosts
+        existing_score = DataQualityScorer.score_host(existing_host_obj)
+        new_score = DataQualityScorer.score_host(new_host_obj)
+        
+        logger.debug("Host data merge comparison", 
+                    ip=ip_address, 
+                    existing_score=existing_score, 
+                    new_score=new_score)
+        
+        if new_score > existing_score:
+            # New data is better, store it
+            logger.info("New host data is better quality", ip=ip_address, new_score=new_score)
+            return new_host_data
+        else:
+            # Existing data is better or equal, but merge individual fields that might be better
+            logger.debug("Existing host data is better quality", ip=ip_address, existing_score=existing_score)
             
-            # Import here to avoid circular imports
-            from app.services.data_quality import DataQualityScorer
-            from app.models.host import Host
+            # Merge specific fields that might be better in new data
+            merged_data = existing_host.copy()
             
-            # Create Host objects for comparison
-            existing_host_obj = Host(**existing_host)
-            new_host_obj = Host(**new_host_data)
+            # Update status if new status is better
+            if self._is_better_status(new_host_obj.status, existing_host_obj.status):
+                merged_data['status'] = new_host_obj.status
+                logger.debug("Updated status", ip=ip_address, new_status=new_host_obj.status)
             
-            # Score both hosts
-            existing_score = DataQualityScorer.score_host(existing_host_obj)
-            new_score = DataQualityScorer.score_host(new_host_obj)
+            # Update last_seen if new data is more recent
+            if new_host_data.get('last_seen') and (
+                not existing_host.get('last_seen') or 
+                new_host_data['last_seen'] > existing_host.get('last_seen')
+            ):
+                merged_data['last_seen'] = new_host_data['last_seen']
             
-            logger.debug("Host data merge comparison", 
-                        ip=ip_address, 
-                        existing_score=existing_score, 
-                        new_score=new_score)
+            # Merge MAC address (prefer non-null)
+            if not merged_data.get('mac_address') and new_host_obj.mac_address:
+                merged_data['mac_address'] = new_host_obj.mac_address
+                logger.debug("Updated MAC address", ip=ip_address, new_mac=new_host_obj.mac_address)
             
-            if new_score > existing_score:
-                # New data is better, store it
-                logger.info("New host data is better quality", ip=ip_address, new_score=new_score)
-                return await self.set_host(new_host_data)
-            else:
-                # Existing data is better or equal, but merge individual fields that might be better
-                logger.debug("Existing host data is better quality", ip=ip_address, existing_score=existing_score)
-                
-                # Merge specific fields that might be better in new data
-                merged_data = existing_host.copy()
-                
-                # Update status if new status is better
-                if self._is_better_status(new_host_obj.status, existing_host_obj.status):
-                    merged_data['status'] = new_host_obj.status
-                    logger.debug("Updated status", ip=ip_address, new_status=new_host_obj.status)
-                
-                # Update last_seen if new data is more recent
-                if new_host_data.get('last_seen') and (
-                    not existing_host.get('last_seen') or 
-                    new_host_data['last_seen'] > existing_host.get('last_seen')
-                ):
-                    merged_data['last_seen'] = new_host_data['last_seen']
-                
-                # Merge MAC address (prefer non-null)
-                if not merged_data.get('mac_address') and new_host_obj.mac_address:
-                    merged_data['mac_address'] = new_host_obj.mac_address
-                    logger.debug("Updated MAC address", ip=ip_address, new_mac=new_host_obj.mac_address)
-                
-                # Merge hostname (prefer non-empty, longer names)
-                if not merged_data.get('hostname') or (new_host_obj.hostname and len(new_host_obj.hostname) > len(merged_data.get('hostname') or '')):
-                    merged_data['hostname'] = new_host_obj.hostname
-                    logger.debug("Updated hostname", ip=ip_address, new_hostname=new_host_obj.hostname)
-                
-                # Merge vendor (prefer non-null)
-                if not merged_data.get('vendor') and new_host_obj.vendor:
-                    merged_data['vendor'] = new_host_obj.vendor
-                    logger.debug("Updated vendor", ip=ip_address, new_vendor=new_host_obj.vendor)
-                
-                # Merge device type (prefer more specific)
-                if not merged_data.get('device_type') or self._is_more_specific_device_type(new_host_obj.device_type, merged_data.get('device_type')):
-                    merged_data['device_type'] = new_host_obj.device_type
-                    logger.debug("Updated device type", ip=ip_address, new_device_type=new_host_obj.device_type)
-                
-                # Merge OS info (prefer longer, more detailed)
-                if not merged_data.get('os_info') or (new_host_obj.os_info and len(new_host_obj.os_info) > len(merged_data.get('os_info') or '')):
-                    merged_data['os_info'] = new_host_obj.os_info
-                    logger.debug("Updated OS info", ip=ip_address, new_os_info=new_host_obj.os_info)
-                
-                # Merge notes (prefer non-null)
-                if not merged_data.get('notes') and new_host_obj.notes:
-                    merged_data['notes'] = new_host_obj.notes
-                    logger.debug("Updated notes", ip=ip_address, new_notes=new_host_obj.notes)
-                
-                # Merge inferred fields if they're missing in existing data
-                if not merged_data.get('inferred_os') and new_host_obj.inferred_os:
-                    merged_data['inferred_os'] = new_host_obj.inferred_os
-                    logger.debug("Updated inferred OS", ip=ip_address, new_inferred_os=new_host_obj.inferred_os)
-                if not merged_data.get('inferred_device_type') and new_host_obj.inferred_device_type:
-                    merged_data['inferred_device_type'] = new_host_obj.inferred_device_type
-                    logger.debug("Updated inferred device type", ip=ip_address, new_inferred_device_type=new_host_obj.inferred_device_type)
-                if not merged_data.get('inference_confidence') and new_host_obj.inference_confidence:
-                    merged_data['inference_confidence'] = new_host_obj.inference_confidence
-                    logger.debug("Updated inference confidence", ip=ip_address, new_confidence=new_host_obj.inference_confidence)
-                
-                # Only update if there were changes
-                if merged_data != existing_host:
-                    return await self.set_host(merged_data)
-                
-                return True
-                
+            # Merge hostname (prefer non-empty, longer names)
+            if not merged_data.get('hostname') or (new_host_obj.hostname and len(new_host_obj.hostname) > len(merged_data.get('hostname') or '')):
+                merged_data['hostname'] = new_host_obj.hostname
+                logger.debug("Updated hostname", ip=ip_address, new_hostname=new_host_obj.hostname)
+            
+            # Merge vendor (prefer non-null)
+            if not merged_data.get('vendor') and new_host_obj.vendor:
+                merged_data['vendor'] = new_host_obj.vendor
+                logger.debug("Updated vendor", ip=ip_address, new_vendor=new_host_obj.vendor)
+            
+            # Merge device type (prefer more specific)
+            if not merged_data.get('device_type') or self._is_more_specific_device_type(new_host_obj.device_type, merged_data.get('device_type')):
+                merged_data['device_type'] = new_host_obj.device_type
+                logger.debug("Updated device type", ip=ip_address, new_device_type=new_host_obj.device_type)
+            
+            # Merge OS info (prefer longer, more detailed)
+            if not merged_data.get('os_info') or (new_host_obj.os_info and len(new_host_obj.os_info) > len(merged_data.get('os_info') or '')):
+                merged_data['os_info'] = new_host_obj.os_info
+                logger.debug("Updated OS info", ip=ip_address, new_os_info=new_host_obj.os_info)
+            
+            # Merge notes (prefer non-null)
+            if not merged_data.get('notes') and new_host_obj.notes:
+                merged_data['notes'] = new_host_obj.notes
+                logger.debug("Updated notes", ip=ip_address, new_notes=new_host_obj.notes)
+            
+            # Merge inferred fields if they're missing in existing data
+            if not merged_data.get('inferred_os') and new_host_obj.inferred_os:
+                merged_data['inferred_os'] = new_host_obj.inferred_os
+                logger.debug("Updated inferred OS", ip=ip_address, new_inferred_os=new_host_obj.inferred_os)
+            if not merged_data.get('inferred_device_type') and new_host_obj.inferred_device_type:
+                merged_data['inferred_device_type'] = new_host_obj.inferred_device_type
+                logger.debug("Updated inferred device type", ip=ip_address, new_inferred_device_type=new_host_obj.inferred_device_type)
+            if not merged_data.get('inference_confidence') and new_host_obj.inference_confidence:
+                merged_data['inference_confidence'] = new_host_obj.inference_confidence
+                logger.debug("Updated inference confidence", ip=ip_address, new_confidence=new_host_obj.inference_confidence)
+            
+            # Only update if there were changes
+            if merged_data != existing_host:
+                return merged_data
+            
+            return None
+    
+    async def merge_hosts_bulk(self, hosts_data: List[Dict[str, Any]]) -> int:
+        """Merge many hosts using one pipelined read and one pipelined write"""
+        if not hosts_data:
+            return 0
+        
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                for host_data in hosts_data:
+                    pipe.hgetall(f"host:{host_data['ip_address']}")
+                existing_rows = await pipe.execute()
+            
+            to_store = []
+            for host_data, existing_data in zip(hosts_data, existing_rows):
+                if not existing_data:
+                    to_store.append(host_data)
+                    continue
+                try:
+                    merged_data = self._resolve_merge(host_data['ip_address'],
+                                                      self._decode_host(existing_data), host_data)
+                except Exception as e:
+                    logger.error("Failed to merge host data", error=str(e), ip=host_data['ip_address'])
+                    continue
+                if merged_data is not None:
+                    to_store.append(merged_data)
+            
+            if to_store:
+                async with self.redis.pipeline(transaction=False) as pipe:
+                    for host_data in to_store:
+                        host_key = f"host:{host_data['ip_address']}"
+                        pipe.hset(host_key, mapping=self._encode_host(host_data))
+                        pipe.sadd("hosts", host_data['ip_address'])
+                        pipe.expire(host_key, 86400)  # 24 hours
+                    await pipe.execute()
+            
+            logger.debug("Bulk host merge completed", hosts=len(hosts_data), stored=len(to_store))
+            return len(to_store)
         except Exception as e:
-            logger.error("Failed to merge host data", error=str(e), ip=ip_address)
-            return False
+            logger.error("Failed to bulk merge hosts", error=str(e), count=len(hosts_data))
+            return 0
     
     def _is_better_status(self, new_status, current_status) -> bool:
         """Check if new status is better than current status"""
@@ -2,6 +2,7 @@
 WOLManager - A Modern Network Host Discovery and WOL Broadcast Service
 """
 
+import asyncio
 from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request
 from fastapi.staticfiles import StaticFiles
@@ -13,7 +14,7 @@ from app.core.config import settings
 from app.api.api_v1.api import api_router
 from app.core.redis_client import redis_client
 from app.services.discovery_service import DiscoveryService
-from app.services.wol_service import WOLService
+from app.services.wol_service import wol_service
 
 # Configure structured logging
 structlog.configure(
@@ -38,14 +39,14 @@ logger = structlog.get_logger(__name__)
 
 # Initialize services
 discovery_service = DiscoveryService()
-wol_service = WOLService()
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Manage application lifespan events"""
     # Startup
-    logger.info("Starting WOLManager application")
+    logger.info("Starting WOLManager application", 
+               event_loop=type(asyncio.get_running_loop()).__module__)
     
     # Test Redis connection
     try:
@@ -70,6 +71,7 @@ async def lifespan(app: FastAPI):
     # Shutdown
     logger.info("Shutting down WOLManager application")
     await discovery_service.stop()
+    wol_service.close()
     await redis_client.close()
     logger.info("Application shutdown complete")
 
@@ -129,5 +131,6 @@ if __name__ == "__main__":
         host=settings.HOST,
         port=settings.PORT,
         reload=settings.DEBUG,
+        loop="auto",  # uvloop when installed (uvicorn[standard]), asyncio otherwise
         access_log=False
     )
@@ -2,11 +2,36 @@
 Host models for WOLManager
 """
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, field_validator
 from typing import Optional, Dict, Any
 from datetime import datetime
 from enum import Enum
 
+# Deletion table stripping MAC address separators in one pass
+_MAC_SEP_TBL = str.maketrans('', '', ':-')
+
+
+def parse_mac(mac_address: str) -> Optional[bytes]:
+    """Convert a MAC address string to its 6 bytes, or None if the format is invalid"""
+    # aabbccddeeff, or aa:bb:cc:dd:ee:ff / aa-bb-cc-dd-ee-ff with one separator throughout.
+    # Separator positions are checked by slicing; bytes.fromhex checks the digits in C.
+    if len(mac_address) == 17:
+        if mac_address[2::3] not in (':::::', '-----'):
+            return None
+        digits = mac_address.translate(_MAC_SEP_TBL)
+        if len(digits) != 12:
+            return None
+    elif len(mac_address) == 12:
+        digits = mac_address
+    else:
+        return None
+    
+    try:
+        mac_bytes = bytes.fromhex(digits)
+    except ValueError:
+        return None
+    return mac_bytes if len(mac_bytes) == 6 else None
+
 
 class DiscoveryMethod(str, Enum):
     """Discovery method enumeration"""
@@ -101,6 +126,18 @@ class WOLRequest(BaseModel):
     ip_address: str = Field(..., description="IP address of the host to wake")
     mac_address: Optional[str] = Field(None, description="MAC address (optional if host exists)")
     broadcast_address: Optional[str] = Field(None, description="Broadcast address (optional)")
+    repeat: int = Field(1, ge=1, le=10, description="Number of magic packets to send (for lossy links)")
+    
+    @field_validator('mac_address')
+    @classmethod
+    def normalize_mac_address(cls, v: Optional[str]) -> Optional[str]:
+        """Canonicalize the MAC to 12 lowercase hex digits"""
+        if not v:
+            return None
+        mac_bytes = parse_mac(v)
+        if mac_bytes is None:
+            raise ValueError("Invalid MAC address format")
+        return mac_bytes.hex()
 
 
 class WOLResponse(BaseModel):
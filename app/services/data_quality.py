@@ -93,6 +93,11 @@ class HostMerger:
         
         return merged_hosts
     
+    @classmethod
+    def merge_pair(cls, existing: Host, new: Host) -> Host:
+        """Merge a newly discovered host into the one already held for its IP"""
+        return cls._merge_host_group([existing, new])
+    
     @classmethod
     def _merge_host_group(cls, hosts: List[Host]) -> Host:
         """Merge a group of hosts with the same IP address"""
@@ -11,7 +11,7 @@ import re
 import platform
 
 from app.models.host import Host, DiscoveryMethod
-from app.services.discovery_methods.base import BaseDiscoveryMethod
+from app.services.discovery_methods.base import BaseDiscoveryMethod, NetworkFilter
 
 logger = structlog.get_logger(__name__)
 
@@ -26,6 +26,8 @@ class ARPDiscovery(BaseDiscoveryMethod):
         """Discover hosts using ARP table"""
         hosts = []
         
+        nf = NetworkFilter.for_network(network)
+        
         try:
             # Get ARP table entries
             arp_entries = await self._get_arp_table()
@@ -37,8 +39,7 @@ class ARPDiscovery(BaseDiscoveryMethod):
                 if ip and mac:
                     # Check if IP is in our network range
                     try:
-                        ip_obj = ipaddress.ip_address(ip)
-                        if ip_obj in network:
+                        if ip in nf:
                             host = self._create_host(
                                 ip_address=ip,
                                 mac_address=mac,
@@ -3,9 +3,33 @@ Base class for discovery methods
 """
 
 from abc import ABC, abstractmethod
-from typing import List
+from dataclasses import dataclass, field
+from typing import Callable, List
+import asyncio
+import functools
 import ipaddress
 from app.models.host import Host, DiscoveryMethod
+from app.services.network_predicate import compile_predicate
+
+# Memoized ipaddress.ip_address; DiscoveryService clears it after each run
+parse_ip = functools.lru_cache(maxsize=4096)(ipaddress.ip_address)
+
+
+@dataclass(frozen=True)
+class NetworkFilter:
+    """Compiled IPv4 network membership check for a discovery network"""
+    
+    network: ipaddress.IPv4Network
+    contains: Callable[[str], bool] = field(repr=False, compare=False)
+    
+    @classmethod
+    @functools.lru_cache(maxsize=16)
+    def for_network(cls, network: ipaddress.IPv4Network) -> "NetworkFilter":
+        """Get the filter for a network, shared by every method in a discovery run"""
+        return cls(network, compile_predicate(network))
+    
+    def __contains__(self, ip: str) -> bool:
+        return self.contains(ip)
 
 
 class BaseDiscoveryMethod(ABC):
@@ -19,6 +43,20 @@ class BaseDiscoveryMethod(ABC):
         """Discover hosts in the given network range"""
         pass
     
+    def dispatch(self, network: ipaddress.IPv4Network) -> asyncio.Task:
+        """Schedule discover() as a task so methods can run as one batch"""
+        return asyncio.create_task(self.discover(network), name=f"discover:{self.method.value}")
+    
+    async def aclose(self):
+        """Release any resources held between discovery runs"""
+        pass
+    
+    async def __aenter__(self):
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.aclose()
+    
     def _create_host(self, ip_address: str, **kwargs) -> Host:
         """Create a Host object with the discovery method set"""
         # Ensure discovered hosts have WOL disabled by default
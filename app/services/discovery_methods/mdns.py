@@ -3,12 +3,12 @@ mDNS/zeroconf discovery method
 """
 
 import ipaddress
-from typing import List
+from typing import Dict, List, Tuple
 import structlog
 import asyncio
 
 from app.models.host import Host, DiscoveryMethod
-from app.services.discovery_methods.base import BaseDiscoveryMethod
+from app.services.discovery_methods.base import BaseDiscoveryMethod, parse_ip
 
 logger = structlog.get_logger(__name__)
 
@@ -23,6 +23,23 @@ except ImportError:
     ServiceListener = None
 
 
+def _txt_get(props: dict, key: str):
+    """Decode a single TXT record value, tolerating missing or non-UTF-8 values"""
+    value = props.get(key.encode())
+    return value.decode('utf-8', 'replace') if isinstance(value, bytes) else None
+
+
+class ServiceEntry:
+    """Discovered mDNS service"""
+    
+    __slots__ = ('type', 'name', 'info')
+    
+    def __init__(self, service_type: str, name: str, info):
+        self.type = service_type
+        self.name = name
+        self.info = info
+
+
 class mDNSDiscovery(BaseDiscoveryMethod):
     """mDNS/zeroconf-based service discovery"""
     
@@ -72,8 +89,8 @@ class mDNSDiscovery(BaseDiscoveryMethod):
             for i, service in enumerate(discovered_services):
                 logger.debug("Processing mDNS service", 
                            service_index=i,
-                           service_name=service.get('name'),
-                           service_type=service.get('type'))
+                           service_name=service.name,
+                           service_type=service.type)
                 
                 host = await self._service_to_host(service, network)
                 if host:
@@ -86,8 +103,8 @@ class mDNSDiscovery(BaseDiscoveryMethod):
                 else:
                     hosts_skipped += 1
                     logger.debug("Skipped mDNS service - could not convert to host", 
-                               service_name=service.get('name'),
-                               service_type=service.get('type'))
+                               service_name=service.name,
+                               service_type=service.type)
             
             zeroconf.close()
             logger.info("mDNS discovery completed", 
@@ -101,37 +118,31 @@ class mDNSDiscovery(BaseDiscoveryMethod):
         
         return hosts
     
-    async def _discover_services(self, zeroconf, service_types: List[str]) -> List[dict]:
+    async def _discover_services(self, zeroconf, service_types: List[str]) -> List[ServiceEntry]:
         """Discover mDNS services"""
         class MDNSServiceListener:
             def __init__(self):
-                self.services = []
+                self.services: Dict[Tuple[str, str], ServiceEntry] = {}
             
             def add_service(self, zeroconf, service_type, name):
                 # Get service info
                 info = zeroconf.get_service_info(service_type, name)
                 if info:
-                    self.services.append({
-                        'type': service_type,
-                        'name': name,
-                        'info': info
-                    })
+                    self.services[(service_type, name)] = ServiceEntry(service_type, name, info)
                     logger.debug("Added mDNS service", service_type=service_type, name=name)
             
             def remove_service(self, zeroconf, service_type, name):
                 # Remove service from list
-                self.services = [s for s in self.services if not (s['type'] == service_type and s['name'] == name)]
+                self.services.pop((service_type, name), None)
                 logger.debug("Removed mDNS service", service_type=service_type, name=name)
             
             def update_service(self, zeroconf, service_type, name):
                 # Update service info
                 info = zeroconf.get_service_info(service_type, name)
-                if info:
-                    for i, service in enumerate(self.services):
-                        if service['type'] == service_type and service['name'] == name:
-                            self.services[i]['info'] = info
-                            logger.debug("Updated mDNS service", service_type=service_type, name=name)
-                            break
+                service = self.services.get((service_type, name))
+                if info and service:
+                    service.info = info
+                    logger.debug("Updated mDNS service", service_type=service_type, name=name)
         
         # Create service browser
         listener = MDNSServiceListener()
@@ -143,14 +154,14 @@ class mDNSDiscovery(BaseDiscoveryMethod):
         # Clean up
         browser.cancel()
         
-        return listener.services
+        return list(listener.services.values())
     
-    async def _service_to_host(self, service: dict, network: ipaddress.IPv4Network) -> Host:
+    async def _service_to_host(self, service: ServiceEntry, network: ipaddress.IPv4Network) -> Host:
         """Convert mDNS service to Host object"""
         try:
-            info = service['info']
-            service_name = service['name']
-            service_type = service['type']
+            info = service.info
+            service_name = service.name
+            service_type = service.type
             
             logger.debug("Converting mDNS service to host", 
                        service_name=service_name,
@@ -167,7 +178,7 @@ class mDNSDiscovery(BaseDiscoveryMethod):
             ip = None
             for addr in addresses:
                 try:
-                    ip_obj = ipaddress.ip_address(addr)
+                    ip_obj = parse_ip(addr)
                     if isinstance(ip_obj, ipaddress.IPv4Address) and ip_obj in network:
                         ip = str(ip_obj)
                         logger.debug("Found IPv4 address in network range", 
@@ -191,16 +202,14 @@ class mDNSDiscovery(BaseDiscoveryMethod):
             # Determine device type based on service
             device_type = self._get_device_type(service_type)
             
-            # Get additional info from TXT records
-            properties = {}
-            if info.properties:
-                properties = {k.decode(): v.decode() for k, v in info.properties.items()}
-                logger.debug("Extracted TXT properties", 
-                           properties=properties,
-                           service_name=service_name)
+            # Get additional info from TXT records (only the keys we use)
+            properties = info.properties or {}
+            manufacturer = _txt_get(properties, 'manufacturer')
+            model = _txt_get(properties, 'model')
+            os_info = _txt_get(properties, 'os')
             
             # Extract vendor info if available
-            vendor = properties.get('manufacturer') or properties.get('model')
+            vendor = manufacturer or model
             
             logger.debug("Creating host from mDNS service", 
                        ip=ip, hostname=hostname, vendor=vendor,
@@ -211,14 +220,14 @@ class mDNSDiscovery(BaseDiscoveryMethod):
                 hostname=hostname,
                 vendor=vendor,
                 device_type=device_type,
-                os_info=properties.get('os')
+                os_info=os_info
             )
             
             return host
             
         except Exception as e:
             logger.debug("Failed to convert service to host", 
-                        service_name=service.get('name', 'unknown'),
+                        service_name=service.name,
                         error=str(e), error_type=type(e).__name__)
             return None
     
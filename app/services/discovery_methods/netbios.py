@@ -3,10 +3,14 @@ NetBIOS/SMB discovery method
 """
 
 import ipaddress
-from typing import List
+from typing import Dict, List, Optional
 import structlog
 import asyncio
+import concurrent.futures
 import socket
+import subprocess
+import re
+import time
 
 from app.models.host import Host, DiscoveryMethod
 from app.services.discovery_methods.base import BaseDiscoveryMethod
@@ -14,11 +18,54 @@ from app.services.discovery_methods.base import BaseDiscoveryMethod
 logger = structlog.get_logger(__name__)
 
 
+class _TokenBucket:
+    """Async token bucket limiting how many operations start per second"""
+    
+    def __init__(self, rate: float, per: float = 1.0):
+        self.rate = rate
+        self.per = per
+        self._tokens = rate
+        self._last = time.monotonic()
+        self._lock = asyncio.Lock()
+    
+    async def __aenter__(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.rate, self._tokens + (now - self._last) * self.rate / self.per)
+                self._last = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) * self.per / self.rate)
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        return False
+
+
 class NetBIOSDiscovery(BaseDiscoveryMethod):
     """NetBIOS/SMB-based host discovery"""
     
     def __init__(self):
         super().__init__(DiscoveryMethod.NETBIOS)
+        self.max_concurrency = 100
+        # Cap peak probe rate without idling between batches
+        self._rate = _TokenBucket(500)
+        self._arp_cache: Optional[Dict[str, str]] = None
+        # Dedicated pool so scan bursts don't starve the shared default executor; created on first use
+        self._executor: Optional[concurrent.futures.ThreadPoolExecutor] = None
+    
+    def _get_executor(self) -> concurrent.futures.ThreadPoolExecutor:
+        """Get the dedicated scan thread pool, creating it on first use"""
+        if self._executor is None:
+            self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=32, thread_name_prefix='netbios')
+        return self._executor
+    
+    async def aclose(self):
+        """Shut down the scan thread pool"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
     
     async def discover(self, network: ipaddress.IPv4Network) -> List[Host]:
         """Discover hosts using NetBIOS/SMB"""
@@ -28,15 +75,30 @@ class NetBIOSDiscovery(BaseDiscoveryMethod):
             # Get list of IPs to scan
             ips_to_scan = [str(ip) for ip in network.hosts()]
             
-            # Scan in batches to avoid overwhelming the network
-            batch_size = 50
-            for i in range(0, len(ips_to_scan), batch_size):
-                batch = ips_to_scan[i:i + batch_size]
-                batch_hosts = await self._scan_batch(batch)
-                hosts.extend(batch_hosts)
-                
-                # Small delay between batches
-                await asyncio.sleep(0.1)
+            # Snapshot the ARP table once so offline hosts can be skipped before any I/O
+            self._arp_cache = await self._load_arp_cache()
+            if self._arp_cache is None:
+                logger.debug("ARP table unavailable - scanning every address")
+            else:
+                # Hosts without an ARP entry are not reachable on the local segment;
+                # drop them here so they neither probe nor use up rate-limit tokens
+                ips_to_scan = [ip for ip in ips_to_scan if ip in self._arp_cache]
+            
+            # Cap in-flight scans instead of running fixed batches with idle gaps
+            semaphore = asyncio.Semaphore(self.max_concurrency)
+            
+            async def scan(ip: str):
+                async with semaphore:
+                    async with self._rate:
+                        return await self._scan_host(ip)
+            
+            results = await asyncio.gather(*(scan(ip) for ip in ips_to_scan), return_exceptions=True)
+            
+            for result in results:
+                if isinstance(result, Host):
+                    hosts.append(result)
+                elif isinstance(result, Exception):
+                    logger.debug("Host scan failed", error=str(result))
             
             logger.info("NetBIOS discovery completed", hosts_found=len(hosts))
             
@@ -45,20 +107,6 @@ class NetBIOSDiscovery(BaseDiscoveryMethod):
         
         return hosts
     
-    async def _scan_batch(self, ips: List[str]) -> List[Host]:
-        """Scan a batch of IP addresses"""
-        tasks = [self._scan_host(ip) for ip in ips]
-        results = await asyncio.gather(*tasks, return_exceptions=True)
-        
-        hosts = []
-        for result in results:
-            if isinstance(result, Host):
-                hosts.append(result)
-            elif isinstance(result, Exception):
-                logger.debug("Host scan failed", error=str(result))
-        
-        return hosts
-    
     async def _scan_host(self, ip: str) -> Host:
         """Scan a single host for NetBIOS information"""
         try:
@@ -91,12 +139,14 @@ class NetBIOSDiscovery(BaseDiscoveryMethod):
         try:
             def reverse_lookup():
                 try:
-                    return socket.gethostbyaddr(ip)[0]
+                    # PTR query only - gethostbyaddr also forward-confirms the name
+                    host, _ = socket.getnameinfo((ip, 0), socket.NI_NAMEREQD)
+                    return host if host != ip else None
                 except (socket.herror, socket.gaierror, socket.timeout):
                     return None
             
-            loop = asyncio.get_event_loop()
-            hostname = await loop.run_in_executor(None, reverse_lookup)
+            loop = asyncio.get_running_loop()
+            hostname = await loop.run_in_executor(self._get_executor(), reverse_lookup)
             return hostname
         except Exception:
             return None
@@ -127,17 +177,17 @@ class NetBIOSDiscovery(BaseDiscoveryMethod):
                 finally:
                     sock.close()
             
-            loop = asyncio.get_event_loop()
-            return await loop.run_in_executor(None, check_port)
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), check_port)
         except Exception:
             return False
     
     async def _get_mac_address(self, ip: str) -> str:
         """Get MAC address via ARP table lookup"""
+        if self._arp_cache is not None:
+            return self._arp_cache.get(ip)
+        
         try:
-            import subprocess
-            import re
-            
             def get_mac():
                 try:
                     # Try different ARP commands based on OS
@@ -162,10 +212,38 @@ class NetBIOSDiscovery(BaseDiscoveryMethod):
                 except Exception:
                     return None
             
-            loop = asyncio.get_event_loop()
-            mac = await loop.run_in_executor(None, get_mac)
+            loop = asyncio.get_running_loop()
+            mac = await loop.run_in_executor(self._get_executor(), get_mac)
             return mac
         except Exception:
             return None
-
+    
+    async def _load_arp_cache(self) -> Optional[Dict[str, str]]:
+        """Read the whole ARP table once, mapping IP to MAC address"""
+        try:
+            def read_arp():
+                try:
+                    # /proc/net/arp has fixed columns:
+                    # IP address, HW type, Flags, HW address, Mask, Device
+                    with open('/proc/net/arp', 'r') as f:
+                        lines = f.readlines()[1:]  # Skip header
+                except OSError:
+                    return None
+                
+                cache = {}
+                for line in lines:
+                    parts = line.split()
+                    if len(parts) < 6:
+                        continue
+                    ip, _, _, mac, _, _ = parts[:6]
+                    # Skip incomplete entries
+                    if mac != '00:00:00:00:00:00':
+                        cache[ip] = mac.upper()
+                
+                return cache
+            
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), read_arp)
+        except Exception:
+            return None
 
@@ -2,17 +2,193 @@
 RouterOS API discovery method
 """
 
+import asyncio
+import functools
 import ipaddress
+import logging
+import re
+import threading
+import time
 from typing import List, Optional
 import structlog
 
 from app.models.host import Host, DiscoveryMethod, HostStatus
 from app.core.config import settings
-from app.services.discovery_methods.base import BaseDiscoveryMethod
+from app.services.discovery_methods.base import BaseDiscoveryMethod, NetworkFilter
 from app.services.dhcp_analyzer import DHCPAnalyzer
 
 logger = structlog.get_logger(__name__)
 
+# Common vendor OUIs (sorted by OUI, deduplicated), keyed in "XX:XX:XX" uppercase form
+_VENDOR_MAP = {
+    '00:03:FF': 'Microsoft',
+    '00:0C:29': 'VMware',
+    '00:15:5D': 'Microsoft Hyper-V',
+    '00:16:3E': 'Xen',
+    '00:1B:44': 'Cisco Systems',
+    '00:1C:14': 'VMware',
+    '00:1C:42': 'Parallels',
+    '00:50:56': 'VMware',
+    '08:00:27': 'Oracle VirtualBox',
+    '0A:00:27': 'Oracle VirtualBox',
+    '14:88:A9': 'ASUSTeK Computer',
+    '1A:C3:AF': 'Apple',
+    '52:54:00': 'QEMU',
+    '70:85:C2': 'Apple',
+    '80:CA:4B': 'Apple',
+    'A8:A1:59': 'LG Electronics',
+    'D8:50:E6': 'Apple',
+    'D8:5E:D3': 'Apple',
+    # Add more vendor OUIs as needed
+}
+
+# Lease/ARP flag values; librouteros already converts RouterOS booleans to bool
+_TRUTHY = frozenset({'true', 'True', 'TRUE', 'yes', True})
+_BOUND_STATES = frozenset({'bound', 'active', 'Bound', 'Active'})
+_PENDING_STATES = frozenset({'offered', 'waiting', 'Offered', 'Waiting'})
+
+# DHCP class ID fingerprints
+_WINDOWS_VERSION_RE = re.compile(r'5\.0|6\.[0-3]|10\.0')
+_ANDROID_VERSION_RE = re.compile(r'dhcp-1[0-3]')
+
+_WINDOWS_VERSIONS = {
+    '5.0': "Windows 2000",
+    '6.0': "Windows Vista/Server 2008",
+    '6.1': "Windows 7/Server 2008 R2",
+    '6.2': "Windows 8/Server 2012",
+    '6.3': "Windows 8.1/Server 2012 R2",
+    '10.0': "Windows 10/11/Server 2016+",
+}
+
+_ANDROID_VERSIONS = {
+    'dhcp-13': "Android 13+",
+    'dhcp-12': "Android 12",
+    'dhcp-11': "Android 11",
+    'dhcp-10': "Android 10",
+}
+
+
+def _classify_version(pattern: re.Pattern, versions: dict, class_id_lower: str, default: str) -> str:
+    """Pick the highest-precedence version fragment present in a class ID"""
+    found = set(pattern.findall(class_id_lower))
+    for fragment, name in versions.items():
+        if fragment in found:
+            return name
+    return default
+
+
+def _classify_windows(class_id_lower: str) -> str:
+    return _classify_version(_WINDOWS_VERSION_RE, _WINDOWS_VERSIONS, class_id_lower, "Windows")
+
+
+def _classify_android(class_id_lower: str) -> str:
+    return _classify_version(_ANDROID_VERSION_RE, _ANDROID_VERSIONS, class_id_lower, "Android")
+
+
+# Fingerprint token -> OS name (or classifier), in precedence order
+_CLASS_ID_OS = {
+    'msft': _classify_windows,
+    'android': _classify_android,
+    'iphone': "iOS",
+    'ipad': "iOS",
+    'linux': "Linux",
+    'ubuntu': "Linux",
+    'debian': "Linux",
+    'routeros': "RouterOS",
+    'mikrotik': "RouterOS",
+    'udhcp': "Linux (udhcp client)",
+    'lguap': "LG U+ AP (Custom)",
+}
+
+
+def _trie_pattern(words) -> str:
+    """Compile literal words into a prefix-factored regex (e.g. ip(?:ad|hone))"""
+    trie = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[''] = {}
+    
+    def render(node) -> str:
+        branches = [re.escape(char) + render(child) for char, child in sorted(node.items()) if char]
+        optional = '' in node
+        if not branches:
+            return ''
+        if len(branches) == 1 and not optional:
+            return branches[0]
+        return f"(?:{'|'.join(branches)}){'?' if optional else ''}"
+    
+    return render(trie)
+
+
+# Single trie-shaped scan per class ID instead of trying each token in turn
+_CLASS_ID_RE = re.compile(_trie_pattern(_CLASS_ID_OS))
+
+
+@functools.lru_cache(maxsize=4096)
+def _analyze_lease_cached(mac_address: str, hostname: str, client_id: str,
+                          comment: str, class_id: str) -> dict:
+    """Run DHCPAnalyzer on a lease, memoized across discovery cycles (treat result as read-only)"""
+    # The analyzer only reads the Client-ID fragment of os_info, so the
+    # cache key can ignore volatile fields like expiry and last-seen
+    return DHCPAnalyzer.analyze_dhcp_lease({
+        'mac_address': mac_address,
+        'hostname': hostname,
+        'os_info': f"Client-ID: {client_id}" if client_id else None,
+        'client_id': client_id,
+        'comment': comment,
+        'class_id': class_id
+    })
+
+
+@functools.lru_cache(maxsize=256)
+def _infer_os_from_class_id(class_id: str) -> Optional[str]:
+    """Infer OS from DHCP class ID"""
+    if not class_id:
+        return None
+    
+    class_id_lower = class_id.lower()
+    
+    # One regex pass finds every fingerprint; the table order decides precedence
+    found = set(_CLASS_ID_RE.findall(class_id_lower))
+    if not found:
+        return None
+    
+    for token, result in _CLASS_ID_OS.items():
+        if token in found:
+            return result(class_id_lower) if callable(result) else result
+    
+    return None
+
+
+@functools.lru_cache(maxsize=256)
+def _determine_host_status(lease_status: str) -> HostStatus:
+    """Determine host status based on DHCP lease status"""
+    # For now, consider all DHCP bound leases as online
+    # In a real implementation, you might ping the host or check last seen time
+    if lease_status in _BOUND_STATES:
+        return HostStatus.ONLINE
+    elif lease_status in _PENDING_STATES:
+        return HostStatus.UNKNOWN
+    else:
+        return HostStatus.OFFLINE
+
+
+@functools.lru_cache(maxsize=256)
+def _determine_arp_host_status(dynamic, invalid, published) -> HostStatus:
+    """Determine host status based on ARP entry flags"""
+    if invalid in _TRUTHY:
+        return HostStatus.OFFLINE
+    elif dynamic in _TRUTHY:
+        # Dynamic ARP entries are usually active
+        return HostStatus.ONLINE
+    elif published in _TRUTHY:
+        # Published ARP entries are usually static/active
+        return HostStatus.ONLINE
+    else:
+        return HostStatus.UNKNOWN
+
 
 class RouterOSAPIDiscovery(BaseDiscoveryMethod):
     """RouterOS API discovery using librouteros"""
@@ -23,10 +199,20 @@ class RouterOSAPIDiscovery(BaseDiscoveryMethod):
         self.username = settings.ROUTEROS_USERNAME
         self.password = settings.ROUTEROS_PASSWORD
         self.port = settings.ROUTEROS_PORT
+        self.idle_timeout = settings.ROUTEROS_API_IDLE_TIMEOUT
+        
+        # Persistent API session, only touched from worker threads under the lock
+        self._api = None
+        self._api_lock = threading.Lock()
+        self._api_last_used = 0.0
+        self._idle_handle: Optional[asyncio.TimerHandle] = None
     
     async def discover(self, network: ipaddress.IPv4Network) -> List[Host]:
         """Discover hosts using RouterOS API"""
         hosts = []
+        seen_ips = set()
+        
+        nf = NetworkFilter.for_network(network)
         
         logger.info("Starting RouterOS API discovery", 
                    routeros_host=self.host, 
@@ -38,250 +224,92 @@ class RouterOSAPIDiscovery(BaseDiscoveryMethod):
             return hosts
         
         try:
-            import librouteros
+            import librouteros.exceptions
             from librouteros import connect
             
-            logger.debug("Connecting to RouterOS API", 
-                        host=self.host, port=self.port, username=self.username)
-            
-            # Connect to RouterOS
-            api = connect(
-                host=self.host,
-                username=self.username,
-                password=self.password,
-                port=self.port
-            )
-            
-            logger.info("Successfully connected to RouterOS API")
-            
-            # Get DHCP leases with detailed information
-            logger.debug("Requesting DHCP leases from RouterOS API")
-            dhcp_leases_generator = api('/ip/dhcp-server/lease/print')
+            def fetch_tables():
+                with self._api_lock:
+                    try:
+                        return self._query_tables(self._get_api(connect))
+                    except (librouteros.exceptions.LibRouterosError, OSError) as e:
+                        # The cached session may have been dropped by the router; reconnect once
+                        logger.info("RouterOS API session failed - reconnecting", error=str(e))
+                        self._close_api()
+                        return self._query_tables(self._get_api(connect))
+                    finally:
+                        self._api_last_used = time.monotonic()
             
-            # Convert generator to list to enable len() and multiple iterations
-            dhcp_leases = list(dhcp_leases_generator)
+            # librouteros is blocking and a connection cannot serve overlapping
+            # requests, so run the whole exchange in a worker thread
+            dhcp_leases, arp_table, dhcp_servers = await asyncio.to_thread(fetch_tables)
+            self._schedule_idle_close()
             
             logger.info("Retrieved DHCP leases from RouterOS API", 
                       total_leases=len(dhcp_leases))
             
-            dhcp_hosts_added = 0
-            for lease in dhcp_leases:
-                logger.debug("Processing DHCP lease", lease_data=lease)
-                
-                if 'address' in lease and 'mac-address' in lease:
-                    ip = lease['address']
-                    mac = lease['mac-address']
-                    hostname = lease.get('host-name', '')
-                    
-                    logger.debug("DHCP lease details", 
-                               ip=ip, mac=mac, hostname=hostname,
-                               lease_fields=list(lease.keys()))
-                    
-                    # Check if IP is in our network range
-                    try:
-                        ip_obj = ipaddress.ip_address(ip)
-                        if ip_obj in network:
-                            # Extract additional information from DHCP lease
-                            client_id = lease.get('client-id', '')
-                            comment = lease.get('comment', '')
-                            class_id = lease.get('class-id', '')
-                            status = lease.get('status', 'active')
-                            server = lease.get('server', '')
-                            expires_after = lease.get('expires-after', '')
-                            last_seen = lease.get('last-seen', '')
-                            active_address = lease.get('active-address', '')
-                            active_mac = lease.get('active-mac-address', '')
-                            
-                            # Get vendor information from MAC address
-                            vendor = self._get_vendor_from_mac(mac)
-                            
-                            # Infer OS from class_id
-                            inferred_os = self._infer_os_from_class_id(class_id)
-                            
-                            # Build OS info from available data
-                            os_info_parts = []
-                            if client_id:
-                                os_info_parts.append(f"Client-ID: {client_id}")
-                            if expires_after:
-                                os_info_parts.append(f"Expires: {expires_after}")
-                            if last_seen:
-                                os_info_parts.append(f"Last seen: {last_seen}")
-                            if server:
-                                os_info_parts.append(f"DHCP Server: {server}")
-                            
-                            os_info = '; '.join(os_info_parts) if os_info_parts else None
-                            
-                            # Use active information if available
-                            final_ip = active_address if active_address else ip
-                            final_mac = active_mac if active_mac else mac
-                            
-                            # Analyze DHCP lease for additional information
-                            lease_data = {
-                                'mac_address': final_mac,
-                                'hostname': hostname,
-                                'os_info': os_info,
-                                'client_id': client_id,
-                                'comment': comment,
-                                'class_id': class_id
-                            }
-                            inferred_info = DHCPAnalyzer.analyze_dhcp_lease(lease_data)
-                            logger.debug("DHCP analysis result", ip=final_ip, inferred=inferred_info)
-                            
-                            # Use inferred information if available
-                            final_vendor = vendor or inferred_info.get('vendor')
-                            final_device_type = f"dhcp_lease_{status}"
-                            if inferred_info.get('device_type'):
-                                final_device_type = f"{final_device_type}_{inferred_info['device_type']}"
-                            
-                            # Enhance OS info with inferred information
-                            enhanced_os_info = os_info or ""
-                            # Use class_id inference first, then DHCP analyzer
-                            final_inferred_os = inferred_os or inferred_info.get('os')
-                            if final_inferred_os:
-                                enhanced_os_info += f"; Inferred OS: {final_inferred_os}" if enhanced_os_info else f"Inferred OS: {final_inferred_os}"
-                            if inferred_info.get('confidence', 0) > 50:
-                                enhanced_os_info += f"; Confidence: {inferred_info['confidence']}%" if enhanced_os_info else f"Confidence: {inferred_info['confidence']}%"
-                            
-                            # Determine host status based on DHCP lease
-                            host_status = self._determine_host_status(status, last_seen, expires_after)
-                            
-                            # Create host with inferred information
-                            host_kwargs = {
-                                'ip_address': final_ip,
-                                'mac_address': final_mac,
-                                'hostname': hostname,
-                                'vendor': final_vendor,
-                                'device_type': final_device_type,
-                                'os_info': enhanced_os_info,
-                                'status': host_status,
-                            }
-                            
-                            # Add inferred fields if they exist
-                            if final_inferred_os:
-                                host_kwargs['inferred_os'] = final_inferred_os
-                            if inferred_info.get('device_type'):
-                                host_kwargs['inferred_device_type'] = inferred_info['device_type']
-                            if inferred_info.get('confidence'):
-                                host_kwargs['inference_confidence'] = inferred_info['confidence']
-                            
-                            logger.debug("Creating host with kwargs", ip=final_ip, kwargs=host_kwargs)
-                            host = self._create_host(**host_kwargs)
-                            hosts.append(host)
-                    except ValueError:
-                        continue
+            # Resolve the log level and bind shared context once, outside the lease loop.
+            # The level comes from the stdlib logger structlog routes through, not the wrapper.
+            lease_log = None
+            if logging.getLogger(__name__).isEnabledFor(logging.DEBUG):
+                lease_log = logger.bind(source="dhcp_lease", network=str(network))
             
-            # Get ARP table with additional information
-            logger.debug("Requesting ARP table from RouterOS API")
-            arp_table_generator = api('/ip/arp/print')
+            # Lease analysis is CPU-bound; keep it off the event loop
+            hosts.extend(await asyncio.to_thread(
+                self._parse_leases, dhcp_leases, nf, seen_ips, lease_log
+            ))
+            dhcp_hosts_added = len(hosts)
             
-            # Convert generator to list
-            arp_table = list(arp_table_generator)
+            logger.info("DHCP lease processing completed", 
+                      total_leases=len(dhcp_leases),
+                      hosts_added=dhcp_hosts_added)
             
             logger.info("Retrieved ARP table from RouterOS API", 
                       total_entries=len(arp_table))
             
-            arp_hosts_added = 0
-            for entry in arp_table:
-                if 'address' in entry and 'mac-address' in entry:
-                    ip = entry['address']
-                    mac = entry['mac-address']
-                    interface = entry.get('interface', '')
-                    comment = entry.get('comment', '')
-                    dhcp = entry.get('dhcp', 'false')
-                    invalid = entry.get('invalid', 'false')
-                    dynamic = entry.get('dynamic', 'false')
-                    published = entry.get('published', 'false')
-                    
-                    # Check if IP is in our network range
-                    try:
-                        ip_obj = ipaddress.ip_address(ip)
-                        if ip_obj in network:
-                            # Check if we already have this host from DHCP
-                            existing = any(h.ip_address == ip for h in hosts)
-                            if not existing:
-                                # Try to get vendor information from MAC address
-                                vendor = self._get_vendor_from_mac(mac)
-                                
-                                # Build OS info from ARP data
-                                arp_info_parts = []
-                                if dhcp == 'true':
-                                    arp_info_parts.append('DHCP')
-                                if dynamic == 'true':
-                                    arp_info_parts.append('Dynamic')
-                                if published == 'true':
-                                    arp_info_parts.append('Published')
-                                if invalid == 'true':
-                                    arp_info_parts.append('Invalid')
-                                if interface:
-                                    arp_info_parts.append(f"Interface: {interface}")
-                                if comment:
-                                    arp_info_parts.append(f"Comment: {comment}")
-                                
-                                os_info = '; '.join(arp_info_parts) if arp_info_parts else None
-                                
-                                # Determine host status based on ARP entry
-                                host_status = self._determine_arp_host_status(dynamic, invalid, published)
-                                
-                                host = self._create_host(
-                                    ip_address=ip,
-                                    mac_address=mac,
-                                    vendor=vendor,
-                                    device_type=f"arp_entry_{interface}",
-                                    os_info=os_info,
-                                    status=host_status
-                                )
-                                hosts.append(host)
-                                arp_hosts_added += 1
-                    except ValueError:
-                        continue
+            hosts.extend(
+                host for host in (
+                    self._parse_arp_entry(entry, nf, seen_ips)
+                    for entry in arp_table
+                ) if host is not None
+            )
+            arp_hosts_added = len(hosts) - dhcp_hosts_added
             
             logger.info("ARP table processing completed", 
                       total_entries=len(arp_table),
                       hosts_added=arp_hosts_added)
             
-            # Get DHCP server information
-            try:
-                logger.debug("Requesting DHCP server information from RouterOS API")
-                dhcp_servers_generator = api('/ip/dhcp-server/print')
-                
-                # Convert generator to list
-                dhcp_servers = list(dhcp_servers_generator)
-                
-                logger.info("Retrieved DHCP server information from RouterOS API", 
-                          total_servers=len(dhcp_servers))
+            # Create host entries for the DHCP servers themselves
+            logger.info("Retrieved DHCP server information from RouterOS API", 
+                      total_servers=len(dhcp_servers))
+            
+            dhcp_server_hosts_added = 0
+            for server in dhcp_servers:
+                server_interface = server.get('interface', '')
+                server_address = server.get('address', '')
+                server_authoritative = server.get('authoritative', 'no')
+                server_disabled = server.get('disabled', 'no')
                 
-                dhcp_server_hosts_added = 0
-                for server in dhcp_servers:
-                    server_interface = server.get('interface', '')
-                    server_address = server.get('address', '')
-                    server_authoritative = server.get('authoritative', 'no')
-                    server_disabled = server.get('disabled', 'no')
+                # Create a host entry for the DHCP server itself
+                if server_address and server_address not in seen_ips:
+                    try:
+                        if server_address in nf:
+                            host = self._create_host(
+                                ip_address=server_address,
+                                mac_address=None,  # DHCP server MAC not available here
+                                hostname=f"DHCP-Server-{server_interface}",
+                                device_type="dhcp_server",
+                                os_info=f"Interface: {server_interface}; Authoritative: {server_authoritative}; Disabled: {server_disabled}"
+                            )
+                            hosts.append(host)
+                            seen_ips.add(server_address)
+                            dhcp_server_hosts_added += 1
+                    except ValueError:
+                        continue
                     
-                    # Create a host entry for the DHCP server itself
-                    if server_address and server_address not in [h.ip_address for h in hosts]:
-                        try:
-                            ip_obj = ipaddress.ip_address(server_address)
-                            if ip_obj in network:
-                                host = self._create_host(
-                                    ip_address=server_address,
-                                    mac_address=None,  # DHCP server MAC not available here
-                                    hostname=f"DHCP-Server-{server_interface}",
-                                    device_type="dhcp_server",
-                                    os_info=f"Interface: {server_interface}; Authoritative: {server_authoritative}; Disabled: {server_disabled}"
-                                )
-                                hosts.append(host)
-                                dhcp_server_hosts_added += 1
-                        except ValueError:
-                            continue
-                        
-                logger.info("DHCP server processing completed", 
-                          total_servers=len(dhcp_servers),
-                          hosts_added=dhcp_server_hosts_added)
-                        
-            except Exception as e:
-                logger.debug("Failed to get DHCP server info", error=str(e))
+            logger.info("DHCP server processing completed", 
+                      total_servers=len(dhcp_servers),
+                      hosts_added=dhcp_server_hosts_added)
             
-            api.close()
             logger.info("RouterOS API discovery completed", 
                       total_hosts_found=len(hosts),
                       dhcp_hosts=len([h for h in hosts if h.device_type and 'dhcp' in h.device_type]),
@@ -294,136 +322,244 @@ class RouterOSAPIDiscovery(BaseDiscoveryMethod):
         
         return hosts
     
-    def _get_vendor_from_mac(self, mac_address: str) -> str:
-        """Get vendor information from MAC address OUI"""
-        try:
-            # Extract first 3 octets (OUI) from MAC address
-            oui = ':'.join(mac_address.split(':')[:3]).upper()
-            
-            # Common vendor OUIs (sorted by OUI, deduplicated)
-            vendor_map = {
-                '00:03:FF': 'Microsoft',
-                '00:0C:29': 'VMware',
-                '00:15:5D': 'Microsoft Hyper-V',
-                '00:16:3E': 'Xen',
-                '00:1B:44': 'Cisco Systems',
-                '00:1C:14': 'VMware',
-                '00:1C:42': 'Parallels',
-                '00:50:56': 'VMware',
-                '02:00:4C:4F': 'Microsoft',
-                '08:00:27': 'Oracle VirtualBox',
-                '0A:00:27': 'Oracle VirtualBox',
-                '14:88:A9': 'ASUSTeK Computer',
-                '1A:C3:AF': 'Apple',
-                '52:54:00': 'QEMU',
-                '70:85:C2': 'Apple',
-                '80:CA:4B': 'Apple',
-                'A8:A1:59': 'LG Electronics',
-                'D8:50:E6': 'Apple',
-                'D8:5E:D3': 'Apple',
-                # Add more vendor OUIs as needed
-            }
-            
-            if oui in vendor_map:
-                return vendor_map[oui]
-            
-            # Try to get vendor from online OUI database (optional)
-            # This could be implemented with an API call or local database
+    def _parse_leases(self, dhcp_leases: List[dict], nf: NetworkFilter, seen_ips: set,
+                      lease_log=None) -> List[Host]:
+        """Build Hosts for all usable DHCP leases (runs in a worker thread)"""
+        # Debug output is sampled: only every 64th lease gets the logger
+        return [
+            host for host in (
+                self._parse_lease(lease, nf, seen_ips, lease_log if idx & 0x3F == 0 else None)
+                for idx, lease in enumerate(dhcp_leases)
+            ) if host is not None
+        ]
+    
+    def _parse_lease(self, lease: dict, nf: NetworkFilter, seen_ips: set,
+                     lease_log=None) -> Optional[Host]:
+        """Build a Host from a DHCP lease, or None if it is incomplete or out of range"""
+        if lease_log is not None:
+            lease_log.debug("Processing DHCP lease", lease_data=lease)
+        
+        ip = lease.get('address')
+        mac = lease.get('mac-address')
+        if not (ip and mac):
             return None
-            
-        except Exception:
+        hostname = lease.get('host-name', '')
+        
+        if lease_log is not None:
+            lease_log.debug("DHCP lease details", ip=ip, mac=mac, hostname=hostname)
+        
+        # Check if IP is in our network range
+        try:
+            if ip not in nf:
+                return None
+        except ValueError:
             return None
+        
+        # Extract additional information from DHCP lease
+        client_id = lease.get('client-id', '')
+        comment = lease.get('comment', '')
+        class_id = lease.get('class-id', '')
+        status = lease.get('status', 'active')
+        server = lease.get('server', '')
+        expires_after = lease.get('expires-after', '')
+        last_seen = lease.get('last-seen', '')
+        active_address = lease.get('active-address', '')
+        active_mac = lease.get('active-mac-address', '')
+        
+        # Get vendor information from MAC address
+        vendor = self._get_vendor_from_mac(mac)
+        
+        # Infer OS from class_id
+        inferred_os = _infer_os_from_class_id(class_id)
+        
+        # Use active information if available
+        final_ip = active_address if active_address else ip
+        final_mac = active_mac if active_mac else mac
+        
+        # Analyze DHCP lease for additional information
+        inferred_info = _analyze_lease_cached(final_mac, hostname, client_id, comment, class_id)
+        if lease_log is not None:
+            lease_log.debug("DHCP analysis result", ip=final_ip, inferred=inferred_info)
+        
+        # Use inferred information if available
+        final_vendor = vendor or inferred_info.get('vendor')
+        final_device_type = f"dhcp_lease_{status}"
+        if inferred_info.get('device_type'):
+            final_device_type = f"{final_device_type}_{inferred_info['device_type']}"
+        
+        # Use class_id inference first, then DHCP analyzer
+        final_inferred_os = inferred_os or inferred_info.get('os')
+        confidence = inferred_info.get('confidence', 0)
+        
+        # Build OS info from lease data and inferred information in one join
+        enhanced_os_info = '; '.join(filter(None, (
+            client_id and f"Client-ID: {client_id}",
+            expires_after and f"Expires: {expires_after}",
+            last_seen and f"Last seen: {last_seen}",
+            server and f"DHCP Server: {server}",
+            final_inferred_os and f"Inferred OS: {final_inferred_os}",
+            confidence > 50 and f"Confidence: {confidence}%",
+        )))
+        
+        # Determine host status based on DHCP lease
+        host_status = _determine_host_status(status)
+        
+        # Create host with inferred information
+        host_kwargs = {
+            'ip_address': final_ip,
+            'mac_address': final_mac,
+            'hostname': hostname,
+            'vendor': final_vendor,
+            'device_type': final_device_type,
+            'os_info': enhanced_os_info,
+            'status': host_status,
+        }
+        
+        # Add inferred fields if they exist
+        if final_inferred_os:
+            host_kwargs['inferred_os'] = final_inferred_os
+        if inferred_info.get('device_type'):
+            host_kwargs['inferred_device_type'] = inferred_info['device_type']
+        if inferred_info.get('confidence'):
+            host_kwargs['inference_confidence'] = inferred_info['confidence']
+        
+        if lease_log is not None:
+            lease_log.debug("Creating host with kwargs", ip=final_ip, kwargs=host_kwargs)
+        seen_ips.add(final_ip)
+        return self._create_host(**host_kwargs)
     
-    def _infer_os_from_class_id(self, class_id: str) -> Optional[str]:
-        """Infer OS from DHCP class ID"""
-        if not class_id:
+    def _parse_arp_entry(self, entry: dict, nf: NetworkFilter, seen_ips: set) -> Optional[Host]:
+        """Build a Host from an ARP entry not already covered by a DHCP lease"""
+        ip = entry.get('address')
+        mac = entry.get('mac-address')
+        if not (ip and mac):
             return None
-            
-        class_id_lower = class_id.lower()
-        
-        # Windows detection
-        if 'msft' in class_id_lower:
-            if '5.0' in class_id_lower:
-                return "Windows 2000"
-            elif '6.0' in class_id_lower:
-                return "Windows Vista/Server 2008"
-            elif '6.1' in class_id_lower:
-                return "Windows 7/Server 2008 R2"
-            elif '6.2' in class_id_lower:
-                return "Windows 8/Server 2012"
-            elif '6.3' in class_id_lower:
-                return "Windows 8.1/Server 2012 R2"
-            elif '10.0' in class_id_lower:
-                return "Windows 10/11/Server 2016+"
-            else:
-                return "Windows"
-        
-        # Android detection
-        if 'android' in class_id_lower:
-            if 'dhcp-13' in class_id_lower:
-                return "Android 13+"
-            elif 'dhcp-12' in class_id_lower:
-                return "Android 12"
-            elif 'dhcp-11' in class_id_lower:
-                return "Android 11"
-            elif 'dhcp-10' in class_id_lower:
-                return "Android 10"
-            else:
-                return "Android"
-        
-        # iOS detection
-        if 'iphone' in class_id_lower or 'ipad' in class_id_lower:
-            return "iOS"
-        
-        # Linux detection
-        if 'linux' in class_id_lower or 'ubuntu' in class_id_lower or 'debian' in class_id_lower:
-            return "Linux"
-        
-        # RouterOS detection
-        if 'routeros' in class_id_lower or 'mikrotik' in class_id_lower:
-            return "RouterOS"
-        
-        # Generic DHCP clients
-        if 'udhcp' in class_id_lower:
-            return "Linux (udhcp client)"
-        
-        # Custom class IDs
-        if 'lguap' in class_id_lower:
-            return "LG U+ AP (Custom)"
+        interface = entry.get('interface', '')
+        comment = entry.get('comment', '')
+        dhcp = entry.get('dhcp', 'false')
+        invalid = entry.get('invalid', 'false')
+        dynamic = entry.get('dynamic', 'false')
+        published = entry.get('published', 'false')
         
-        return None
+        # Check if IP is in our network range
+        try:
+            if ip not in nf:
+                return None
+        except ValueError:
+            return None
+        
+        # Check if we already have this host from DHCP
+        if ip in seen_ips:
+            return None
+        
+        # Try to get vendor information from MAC address
+        vendor = self._get_vendor_from_mac(mac)
+        
+        # Build OS info from ARP data
+        os_info = '; '.join(filter(None, (
+            dhcp in _TRUTHY and 'DHCP',
+            dynamic in _TRUTHY and 'Dynamic',
+            published in _TRUTHY and 'Published',
+            invalid in _TRUTHY and 'Invalid',
+            interface and f"Interface: {interface}",
+            comment and f"Comment: {comment}",
+        ))) or None
+        
+        # Determine host status based on ARP entry
+        host_status = _determine_arp_host_status(dynamic, invalid, published)
+        
+        seen_ips.add(ip)
+        return self._create_host(
+            ip_address=ip,
+            mac_address=mac,
+            vendor=vendor,
+            device_type=f"arp_entry_{interface}",
+            os_info=os_info,
+            status=host_status
+        )
     
-    def _determine_host_status(self, lease_status: str, last_seen: str, expires_after: str) -> HostStatus:
-        """Determine host status based on DHCP lease information"""
+    def _get_api(self, connect):
+        """Return the cached API session, connecting on first use"""
+        if self._api is None:
+            logger.debug("Connecting to RouterOS API", 
+                        host=self.host, port=self.port, username=self.username)
+            
+            self._api = connect(
+                host=self.host,
+                username=self.username,
+                password=self.password,
+                port=self.port
+            )
+            
+            logger.info("Successfully connected to RouterOS API")
+        return self._api
+    
+    def _query_tables(self, api):
+        """Fetch DHCP leases, ARP table and DHCP servers over one API session"""
+        # Generators are drained here so the socket reads stay on this thread
+        logger.debug("Requesting DHCP leases from RouterOS API")
+        dhcp_leases = list(api('/ip/dhcp-server/lease/print'))
+        
+        logger.debug("Requesting ARP table from RouterOS API")
+        arp_table = list(api('/ip/arp/print'))
+        
         try:
-            # Parse lease status
-            if lease_status.lower() in ['bound', 'active']:
-                # Check if lease is recent (within last 24 hours)
-                if last_seen:
-                    # For now, consider all DHCP bound leases as online
-                    # In a real implementation, you might ping the host or check last seen time
-                    return HostStatus.ONLINE
-                return HostStatus.ONLINE
-            elif lease_status.lower() in ['offered', 'waiting']:
-                return HostStatus.UNKNOWN
-            else:
-                return HostStatus.OFFLINE
-        except Exception:
-            return HostStatus.UNKNOWN
+            logger.debug("Requesting DHCP server information from RouterOS API")
+            dhcp_servers = list(api('/ip/dhcp-server/print'))
+        except Exception as e:
+            logger.debug("Failed to get DHCP server info", error=str(e))
+            dhcp_servers = []
+        
+        return dhcp_leases, arp_table, dhcp_servers
+    
+    def _close_api(self):
+        """Close the cached API session, if any"""
+        api, self._api = self._api, None
+        if api is not None:
+            try:
+                api.close()
+            except Exception as e:
+                logger.debug("Failed to close RouterOS API session", error=str(e))
+    
+    def _close_idle_api(self):
+        """Close the API session if it has not been used within the idle timeout"""
+        self._idle_handle = None
+        if time.monotonic() - self._api_last_used < self.idle_timeout:
+            return
+        # Skip if a discovery run currently holds the session
+        if self._api_lock.acquire(blocking=False):
+            try:
+                if self._api is not None:
+                    logger.debug("Closing idle RouterOS API session")
+                self._close_api()
+            finally:
+                self._api_lock.release()
     
-    def _determine_arp_host_status(self, dynamic: str, invalid: str, published: str) -> HostStatus:
-        """Determine host status based on ARP entry information"""
+    def _schedule_idle_close(self):
+        """(Re)arm the idle-timeout watcher for the API session"""
+        if self._idle_handle is not None:
+            self._idle_handle.cancel()
+        self._idle_handle = asyncio.get_running_loop().call_later(
+            self.idle_timeout, self._close_idle_api
+        )
+    
+    async def aclose(self):
+        """Close the persistent API session"""
+        if self._idle_handle is not None:
+            self._idle_handle.cancel()
+            self._idle_handle = None
+        
+        def close_locked():
+            with self._api_lock:
+                self._close_api()
+        
+        # Wait for any in-flight query without blocking the event loop
+        await asyncio.to_thread(close_locked)
+    
+    def _get_vendor_from_mac(self, mac_address: str) -> str:
+        """Get vendor information from MAC address OUI"""
         try:
-            if invalid.lower() == 'true':
-                return HostStatus.OFFLINE
-            elif dynamic.lower() == 'true':
-                # Dynamic ARP entries are usually active
-                return HostStatus.ONLINE
-            elif published.lower() == 'true':
-                # Published ARP entries are usually static/active
-                return HostStatus.ONLINE
-            else:
-                return HostStatus.UNKNOWN
+            # First 3 octets (OUI) of a colon-separated MAC address
+            return _VENDOR_MAP.get(mac_address[:8].upper())
         except Exception:
-            return HostStatus.UNKNOWN
-
+            return None
@@ -2,17 +2,67 @@
 RouterOS REST API discovery method
 """
 
+import asyncio
 import ipaddress
-from typing import List
+import logging
+from typing import List, Optional
 import structlog
 import httpx
 
 from app.models.host import Host, DiscoveryMethod
 from app.core.config import settings
-from app.services.discovery_methods.base import BaseDiscoveryMethod
+from app.services.discovery_methods.base import BaseDiscoveryMethod, NetworkFilter
 
 logger = structlog.get_logger(__name__)
 
+# Faster C JSON decoder for whole response bodies
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Optional incremental JSON parser for large lease/ARP tables
+try:
+    import ijson
+    IJSON_AVAILABLE = True
+except ImportError:
+    ijson = None
+    IJSON_AVAILABLE = False
+
+
+class _AsyncByteReader:
+    """Expose an async byte-chunk iterator through the read() interface ijson expects"""
+    
+    def __init__(self, chunks):
+        self._chunks = chunks.__aiter__()
+    
+    async def read(self, size: int = -1) -> bytes:
+        # ijson probes with read(0) to detect bytes vs str; don't consume a chunk
+        if size == 0:
+            return b''
+        try:
+            return await self._chunks.__anext__()
+        except StopAsyncIteration:
+            return b''
+
+
+# REST table paths, relative to the pooled client's base_url
+_DHCP_LEASE_PATH = "/rest/ip/dhcp-server/lease"
+_ARP_PATH = "/rest/ip/arp"
+
+
+def _usable_entry(entry: dict, nf: NetworkFilter) -> bool:
+    """Check a lease/ARP entry has an address and MAC inside the discovery network"""
+    ip = entry.get('address')
+    if not (ip and entry.get('mac-address')):
+        return False
+    try:
+        return ip in nf
+    except ValueError as e:
+        logger.warning("Invalid IP address in RouterOS entry", 
+                     ip=ip, error=str(e))
+        return False
+
 
 class RouterOSRestDiscovery(BaseDiscoveryMethod):
     """RouterOS REST API discovery"""
@@ -23,10 +73,64 @@ class RouterOSRestDiscovery(BaseDiscoveryMethod):
         self.username = settings.ROUTEROS_USERNAME
         self.password = settings.ROUTEROS_PASSWORD
         self.port = 80  # REST API port
+        self._base_url = f"http://{self.host}"
+        self._dhcp_url = self._base_url + _DHCP_LEASE_PATH
+        self._arp_url = self._base_url + _ARP_PATH
+        self._auth = httpx.BasicAuth(self.username, self.password) if self.username and self.password else None
+        self._client: Optional[httpx.AsyncClient] = None
+    
+    def _get_client(self) -> httpx.AsyncClient:
+        """Get the pooled HTTP client, creating it on first use inside the event loop"""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                auth=self._auth,
+                base_url=self._base_url,
+                limits=httpx.Limits(max_keepalive_connections=10, max_connections=20,
+                                    keepalive_expiry=60),
+                timeout=10
+            )
+        return self._client
+    
+    async def aclose(self):
+        """Close the pooled HTTP client"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+    
+    async def _fetch_table(self, client: httpx.AsyncClient, path: str, label: str,
+                           nf: NetworkFilter) -> Optional[list]:
+        """GET the usable entries of a RouterOS REST table, stream-parsing when ijson is available"""
+        try:
+            async with client.stream("GET", path, timeout=10) as response:
+                if response.status_code != 200:
+                    await response.aread()
+                    logger.warning(f"Failed to retrieve {label}", 
+                                 status_code=response.status_code,
+                                 response_text=response.text[:200])
+                    return None
+                
+                if IJSON_AVAILABLE:
+                    # Decode and filter entries as chunks arrive instead of buffering the whole body
+                    reader = _AsyncByteReader(response.aiter_bytes())
+                    return [item async for item in ijson.items_async(reader, 'item')
+                            if _usable_entry(item, nf)]
+                
+                await response.aread()
+                table = orjson.loads(response.content) if orjson is not None else response.json()
+                return [item for item in table if _usable_entry(item, nf)]
+        except Exception as e:
+            logger.warning(f"Failed to retrieve {label}", 
+                         error=str(e),
+                         error_type=type(e).__name__)
+            return None
     
     async def discover(self, network: ipaddress.IPv4Network) -> List[Host]:
         """Discover hosts using RouterOS REST API"""
         hosts = []
+        seen_ips = set()
+        
+        # _fetch_table drops out-of-network entries while the tables are still being parsed
+        nf = NetworkFilter.for_network(network)
         
         logger.info("Starting RouterOS REST discovery", 
                    routeros_host=self.host, 
@@ -37,158 +141,77 @@ class RouterOSRestDiscovery(BaseDiscoveryMethod):
             return hosts
         
         try:
-            # Create HTTP client with basic auth for RouterOS REST API
-            auth = httpx.BasicAuth(self.username, self.password)
+            # Reuse the pooled client so connections stay alive across runs
+            client = self._get_client()
             
-            async with httpx.AsyncClient(auth=auth) as client:
-                
-                # Get DHCP leases
-                logger.debug("Requesting DHCP leases from RouterOS", 
-                           url=f"http://{self.host}/rest/ip/dhcp-server/lease")
-                
-                dhcp_response = await client.get(
-                    f"http://{self.host}/rest/ip/dhcp-server/lease",
-                    timeout=10
-                )
-                
-                logger.debug("DHCP leases response", 
-                           status_code=dhcp_response.status_code,
-                           content_length=len(dhcp_response.content) if dhcp_response.content else 0)
-                
-                if dhcp_response.status_code == 200:
-                    dhcp_leases = dhcp_response.json()
-                    logger.info("Retrieved DHCP leases from RouterOS", 
-                              total_leases=len(dhcp_leases))
-                    
-                    dhcp_hosts_added = 0
-                    for lease in dhcp_leases:
-                        logger.debug("Processing DHCP lease", lease_data=lease)
-                        
-                        if 'address' in lease and 'mac-address' in lease:
-                            ip = lease['address']
-                            mac = lease['mac-address']
-                            hostname = lease.get('host-name', '')
-                            
-                            logger.debug("DHCP lease details", 
-                                       ip=ip, mac=mac, hostname=hostname,
-                                       lease_fields=list(lease.keys()))
-                            
-                            # Check if IP is in our network range
-                            try:
-                                ip_obj = ipaddress.ip_address(ip)
-                                if ip_obj in network:
-                                    host = self._create_host(
-                                        ip_address=ip,
-                                        mac_address=mac,
-                                        hostname=hostname,
-                                        device_type="dhcp_lease"
-                                    )
-                                    hosts.append(host)
-                                    dhcp_hosts_added += 1
-                                    
-                                    logger.debug("Added host from DHCP lease", 
-                                               ip=ip, mac=mac, hostname=hostname)
-                                else:
-                                    logger.debug("DHCP lease IP outside network range", 
-                                               ip=ip, network=str(network))
-                            except ValueError as e:
-                                logger.warning("Invalid IP address in DHCP lease", 
-                                             ip=ip, error=str(e))
-                                continue
-                        else:
-                            logger.debug("DHCP lease missing required fields", 
-                                       lease_data=lease,
-                                       has_address='address' in lease,
-                                       has_mac='mac-address' in lease)
-                    
-                    logger.info("DHCP lease processing completed", 
-                              total_leases=len(dhcp_leases),
-                              hosts_added=dhcp_hosts_added)
-                else:
-                    logger.warning("Failed to retrieve DHCP leases", 
-                                 status_code=dhcp_response.status_code,
-                                 response_text=dhcp_response.text[:200])
-                
-                # Get ARP table
-                logger.debug("Requesting ARP table from RouterOS", 
-                           url=f"http://{self.host}/rest/ip/arp")
+            # Get DHCP leases and ARP table concurrently
+            logger.debug("Requesting DHCP leases and ARP table from RouterOS", 
+                       dhcp_url=self._dhcp_url,
+                       arp_url=self._arp_url)
+            
+            dhcp_leases, arp_table = await asyncio.gather(
+                self._fetch_table(client, _DHCP_LEASE_PATH, "DHCP leases", nf),
+                self._fetch_table(client, _ARP_PATH, "ARP table", nf)
+            )
+            
+            dhcp_hosts_added = 0
+            arp_hosts_added = 0
+            
+            if dhcp_leases is not None:
+                logger.info("Retrieved DHCP leases from RouterOS", 
+                          leases_in_range=len(dhcp_leases))
                 
-                arp_response = await client.get(
-                    f"http://{self.host}/rest/ip/arp",
-                    timeout=10
-                )
+                # No per-entry logging here: this loop runs once per lease
+                for lease in dhcp_leases:
+                    ip = lease['address']
+                    host = self._create_host(
+                        ip_address=ip,
+                        mac_address=lease['mac-address'],
+                        hostname=lease.get('host-name', ''),
+                        device_type="dhcp_lease"
+                    )
+                    hosts.append(host)
+                    seen_ips.add(ip)
+                    dhcp_hosts_added += 1
                 
-                logger.debug("ARP table response", 
-                           status_code=arp_response.status_code,
-                           content_length=len(arp_response.content) if arp_response.content else 0)
+                logger.info("DHCP lease processing completed", 
+                          leases_in_range=len(dhcp_leases),
+                          hosts_added=dhcp_hosts_added)
+            
+            if arp_table is not None:
+                logger.info("Retrieved ARP table from RouterOS", 
+                          entries_in_range=len(arp_table))
                 
-                if arp_response.status_code == 200:
-                    arp_table = arp_response.json()
-                    logger.info("Retrieved ARP table from RouterOS", 
-                              total_entries=len(arp_table))
+                arp_hosts_skipped = 0
+                for entry in arp_table:
+                    ip = entry['address']
                     
-                    arp_hosts_added = 0
-                    arp_hosts_skipped = 0
-                    for entry in arp_table:
-                        logger.debug("Processing ARP entry", arp_data=entry)
-                        
-                        if 'address' in entry and 'mac-address' in entry:
-                            ip = entry['address']
-                            mac = entry['mac-address']
-                            
-                            logger.debug("ARP entry details", 
-                                       ip=ip, mac=mac,
-                                       entry_fields=list(entry.keys()))
-                            
-                            # Check if IP is in our network range
-                            try:
-                                ip_obj = ipaddress.ip_address(ip)
-                                if ip_obj in network:
-                                    # Check if we already have this host from DHCP
-                                    existing = any(h.ip_address == ip for h in hosts)
-                                    if not existing:
-                                        host = self._create_host(
-                                            ip_address=ip,
-                                            mac_address=mac,
-                                            device_type="arp_entry"
-                                        )
-                                        hosts.append(host)
-                                        arp_hosts_added += 1
-                                        
-                                        logger.debug("Added host from ARP entry", 
-                                                   ip=ip, mac=mac)
-                                    else:
-                                        arp_hosts_skipped += 1
-                                        logger.debug("Skipped ARP entry - host already exists from DHCP", 
-                                                   ip=ip, mac=mac)
-                                else:
-                                    logger.debug("ARP entry IP outside network range", 
-                                               ip=ip, network=str(network))
-                            except ValueError as e:
-                                logger.warning("Invalid IP address in ARP entry", 
-                                             ip=ip, error=str(e))
-                                continue
-                        else:
-                            logger.debug("ARP entry missing required fields", 
-                                       arp_data=entry,
-                                       has_address='address' in entry,
-                                       has_mac='mac-address' in entry)
+                    # Check if we already have this host from DHCP
+                    if ip in seen_ips:
+                        arp_hosts_skipped += 1
+                        continue
                     
-                    logger.info("ARP table processing completed", 
-                              total_entries=len(arp_table),
-                              hosts_added=arp_hosts_added,
-                              hosts_skipped=arp_hosts_skipped)
-                else:
-                    logger.warning("Failed to retrieve ARP table", 
-                                 status_code=arp_response.status_code,
-                                 response_text=arp_response.text[:200])
-                
-                logger.info("RouterOS REST discovery completed", 
-                          total_hosts_found=len(hosts),
-                          dhcp_hosts=len([h for h in hosts if h.device_type == "dhcp_lease"]),
-                          arp_hosts=len([h for h in hosts if h.device_type == "arp_entry"]))
+                    host = self._create_host(
+                        ip_address=ip,
+                        mac_address=entry['mac-address'],
+                        device_type="arp_entry"
+                    )
+                    hosts.append(host)
+                    seen_ips.add(ip)
+                    arp_hosts_added += 1
                 
-                # Log final host data for debugging
+                logger.info("ARP table processing completed", 
+                          entries_in_range=len(arp_table),
+                          hosts_added=arp_hosts_added,
+                          hosts_skipped=arp_hosts_skipped)
+            
+            logger.info("RouterOS REST discovery completed", 
+                      total_hosts_found=len(hosts),
+                      dhcp_hosts=dhcp_hosts_added,
+                      arp_hosts=arp_hosts_added)
+            
+            # Log final host data for debugging (level read from the stdlib logger, whatever structlog's wrapper)
+            if logging.getLogger(__name__).isEnabledFor(logging.DEBUG):
                 for i, host in enumerate(hosts):
                     logger.debug("Final host data", 
                                host_index=i,
@@ -197,7 +220,7 @@ class RouterOSRestDiscovery(BaseDiscoveryMethod):
                                hostname=host.hostname,
                                device_type=host.device_type,
                                discovery_method=host.discovery_method)
-                
+            
         except Exception as e:
             logger.error("RouterOS REST discovery failed", 
                         error=str(e),
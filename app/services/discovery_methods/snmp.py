@@ -1,54 +1,189 @@
 """
-SNMP discovery method - simplified implementation
+SNMP discovery method - minimal SNMPv2c client
 """
 
 import ipaddress
-from typing import List
+from typing import Dict, List, Optional, Tuple
 import structlog
 import asyncio
-import socket
-import struct
-import time
+import random
 
 from app.models.host import Host, DiscoveryMethod
 from app.core.config import settings
-from app.services.discovery_methods.base import BaseDiscoveryMethod
+from app.services.discovery_methods.base import BaseDiscoveryMethod, NetworkFilter
 
 logger = structlog.get_logger(__name__)
 
+_SYS_DESCR = (1, 3, 6, 1, 2, 1, 1, 1, 0)
+_IP_NET_TO_MEDIA_PHYS_ADDRESS = (1, 3, 6, 1, 2, 1, 4, 22, 1, 2)
+
+_GET_REQUEST = 0xA0
+_GET_BULK_REQUEST = 0xA5
+_END_OF_MIB_VIEW = 0x82
+
+# Rows requested per GETBULK round trip
+_BULK_MAX_REPETITIONS = 50
+
+
+def _ber(tag: int, payload: bytes) -> bytes:
+    """Encode a BER type-length-value"""
+    length = len(payload)
+    if length < 0x80:
+        return bytes((tag, length)) + payload
+    size = (length.bit_length() + 7) // 8
+    return bytes((tag, 0x80 | size)) + length.to_bytes(size, 'big') + payload
+
+
+def _ber_int(value: int) -> bytes:
+    """Encode a BER INTEGER"""
+    return _ber(0x02, value.to_bytes(max(1, (value.bit_length() + 8) // 8), 'big', signed=True))
+
+
+def _encode_oid(oid: tuple) -> bytes:
+    """Encode an OBJECT IDENTIFIER"""
+    body = bytearray((oid[0] * 40 + oid[1],))
+    for arc in oid[2:]:
+        chunk = [arc & 0x7F]
+        arc >>= 7
+        while arc:
+            chunk.append(0x80 | (arc & 0x7F))
+            arc >>= 7
+        body.extend(reversed(chunk))
+    return _ber(0x06, bytes(body))
+
+
+def _decode_oid(body: bytes) -> tuple:
+    """Decode the contents of an OBJECT IDENTIFIER"""
+    oid = [body[0] // 40, body[0] % 40]
+    arc = 0
+    for byte in body[1:]:
+        arc = (arc << 7) | (byte & 0x7F)
+        if not byte & 0x80:
+            oid.append(arc)
+            arc = 0
+    return tuple(oid)
+
+
+def _ber_read(data: bytes, pos: int):
+    """Read one TLV header at pos, returning (tag, value_start, value_end)"""
+    tag = data[pos]
+    length = data[pos + 1]
+    pos += 2
+    if length & 0x80:
+        size = length & 0x7F
+        length = int.from_bytes(data[pos:pos + size], 'big')
+        pos += size
+    return tag, pos, pos + length
+
+
+def _build_request(community: bytes, request_id: int, pdu_type: int, oid: tuple,
+                   non_repeaters: int = 0, max_repetitions: int = 0) -> bytes:
+    """Build an SNMPv2c request PDU for a single OID"""
+    # GetBulk reuses the error-status/error-index slots for its two counters
+    varbind = _ber(0x30, _encode_oid(oid) + b'\x05\x00')
+    pdu = _ber(pdu_type,
+               _ber_int(request_id)
+               + _ber_int(non_repeaters)
+               + _ber_int(max_repetitions)
+               + _ber(0x30, varbind))
+    return _ber(0x30, b'\x02\x01\x01' + _ber(0x04, community) + pdu)
+
+
+def _response_request_id(data: bytes) -> int:
+    """Read just the request ID from an SNMP message"""
+    _, pos, _ = _ber_read(data, 0)             # message sequence
+    _, _, pos = _ber_read(data, pos)           # version
+    _, _, pos = _ber_read(data, pos)           # community
+    _, pos, _ = _ber_read(data, pos)           # PDU
+    _, start, end = _ber_read(data, pos)
+    return int.from_bytes(data[start:end], 'big', signed=True)
+
+
+def _parse_response(data: bytes):
+    """Parse an SNMP response into (request_id, error_status, [(oid, tag, value), ...])"""
+    _, pos, _ = _ber_read(data, 0)             # message sequence
+    _, _, pos = _ber_read(data, pos)           # version
+    _, _, pos = _ber_read(data, pos)           # community
+    _, pos, _ = _ber_read(data, pos)           # response PDU
+    _, start, pos = _ber_read(data, pos)
+    request_id = int.from_bytes(data[start:pos], 'big', signed=True)
+    _, start, pos = _ber_read(data, pos)
+    error_status = int.from_bytes(data[start:pos], 'big')
+    _, _, pos = _ber_read(data, pos)           # error-index
+    _, pos, end = _ber_read(data, pos)         # varbind list
+    
+    varbinds = []
+    while pos < end:
+        _, vb_start, pos = _ber_read(data, pos)
+        _, oid_start, oid_end = _ber_read(data, vb_start)
+        tag, value_start, value_end = _ber_read(data, oid_end)
+        varbinds.append((_decode_oid(data[oid_start:oid_end]), tag, data[value_start:value_end]))
+    return request_id, error_status, varbinds
+
+
+class _SNMPClientProtocol(asyncio.DatagramProtocol):
+    """Route SNMP responses from one device to the request waiting for them"""
+    
+    def __init__(self):
+        self.pending: Dict[int, asyncio.Future] = {}
+    
+    def datagram_received(self, data: bytes, addr):
+        try:
+            request_id = _response_request_id(data)
+        except (IndexError, ValueError):
+            return
+        future = self.pending.pop(request_id, None)
+        if future is not None and not future.done():
+            future.set_result(data)
+    
+    def error_received(self, exc):
+        # ICMP port unreachable on the connected socket: nothing is listening, fail fast
+        self._fail_pending(exc)
+    
+    def connection_lost(self, exc):
+        self._fail_pending(ConnectionError("SNMP socket closed"))
+    
+    def _fail_pending(self, exc: Exception):
+        for future in self.pending.values():
+            if not future.done():
+                future.set_exception(exc)
+        self.pending.clear()
+
 
 class SNMPDiscovery(BaseDiscoveryMethod):
-    """SNMP-based network discovery using simplified implementation"""
+    """SNMP-based network discovery using a minimal SNMPv2c client"""
     
     def __init__(self):
         super().__init__(DiscoveryMethod.SNMP)
         self.community = settings.SNMP_COMMUNITY.encode('utf-8')
         self.timeout = settings.SNMP_TIMEOUT
+        
+        # One connected UDP socket per device, reused across runs and opened on first use inside the
+        # event loop. Connecting lets ICMP port-unreachable fail a request at once instead of timing out.
+        self._endpoints: Dict[str, Tuple[asyncio.DatagramTransport, _SNMPClientProtocol]] = {}
+        self._transport_lock: Optional[asyncio.Lock] = None
     
     async def discover(self, network: ipaddress.IPv4Network) -> List[Host]:
         """Discover hosts using SNMP"""
         hosts = []
         
         try:
-            # Get network devices (routers, switches) first
-            gateway_ip = str(network.network_address + 1)
-            
-            # Try to discover from gateway device
-            if await self._is_snmp_available(gateway_ip):
-                gateway_hosts = await self._discover_from_device(gateway_ip, network)
-                hosts.extend(gateway_hosts)
-            
-            # Try to discover from other potential network devices
-            potential_devices = [
+            # Candidate network devices (routers, switches); dict keeps order and drops duplicates
+            candidates = list(dict.fromkeys([
                 str(network.network_address + 1),  # Gateway
                 str(network.network_address + 2),  # Secondary gateway
                 str(network.network_address + 254),  # Common gateway
-            ]
+            ]))
+            
+            # Probe all candidates at once so the worst case is one timeout, not one per device
+            available = await asyncio.gather(*(self._is_snmp_available(ip) for ip in candidates))
             
-            for device_ip in potential_devices:
-                if device_ip != gateway_ip and await self._is_snmp_available(device_ip):
-                    device_hosts = await self._discover_from_device(device_ip, network)
-                    hosts.extend(device_hosts)
+            device_results = await asyncio.gather(*(
+                self._discover_from_device(ip, network)
+                for ip, ok in zip(candidates, available) if ok
+            ))
+            for device_hosts in device_results:
+                hosts.extend(device_hosts)
             
             logger.info("SNMP discovery completed", hosts_found=len(hosts))
             
@@ -58,35 +193,104 @@ class SNMPDiscovery(BaseDiscoveryMethod):
         return hosts
     
     async def _is_snmp_available(self, ip: str) -> bool:
-        """Check if SNMP is available on the device using simple socket check"""
+        """Check if SNMP is answering on the device with a GET for sysDescr.0"""
+        request_id = random.randint(1, 0x7FFFFFFF)
+        packet = _build_request(self.community, request_id, _GET_REQUEST, _SYS_DESCR)
+        return await self._request(ip, packet, request_id) is not None
+    
+    async def _get_endpoint(self, ip: str) -> Tuple[asyncio.DatagramTransport, _SNMPClientProtocol]:
+        """Get the socket connected to a device's SNMP port, opening it on first use"""
+        if self._transport_lock is None:
+            self._transport_lock = asyncio.Lock()
+        async with self._transport_lock:
+            endpoint = self._endpoints.get(ip)
+            if endpoint is None or endpoint[0].is_closing():
+                loop = asyncio.get_running_loop()
+                endpoint = await loop.create_datagram_endpoint(
+                    _SNMPClientProtocol,
+                    remote_addr=(ip, 161)
+                )
+                self._endpoints[ip] = endpoint
+        return endpoint
+    
+    async def _request(self, ip: str, packet: bytes, request_id: int):
+        """Send one SNMP request and wait for the matching response, or None"""
+        try:
+            transport, protocol = await self._get_endpoint(ip)
+        except OSError:
+            return None
+        
+        future = asyncio.get_running_loop().create_future()
+        protocol.pending[request_id] = future
         try:
-            def check_snmp_port():
-                sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-                sock.settimeout(self.timeout)
-                try:
-                    # Try to connect to SNMP port
-                    sock.connect((ip, 161))
-                    sock.close()
-                    return True
-                except (socket.timeout, socket.error, ConnectionRefusedError):
-                    sock.close()
-                    return False
+            transport.sendto(packet)
+            return await asyncio.wait_for(future, self.timeout)
+        except (asyncio.TimeoutError, OSError):
+            return None
+        finally:
+            protocol.pending.pop(request_id, None)
+    
+    async def aclose(self):
+        """Close the per-device SNMP sockets"""
+        for transport, _ in self._endpoints.values():
+            transport.close()
+        self._endpoints.clear()
+    
+    async def _bulk_walk(self, device_ip: str, base_oid: tuple) -> List[Tuple[tuple, bytes]]:
+        """Walk a subtree with GETBULK, fetching many rows per round trip"""
+        rows = []
+        current = base_oid
+        
+        while True:
+            request_id = random.randint(1, 0x7FFFFFFF)
+            packet = _build_request(self.community, request_id, _GET_BULK_REQUEST, current,
+                                    non_repeaters=0, max_repetitions=_BULK_MAX_REPETITIONS)
+            response = await self._request(device_ip, packet, request_id)
+            if response is None:
+                break
+            
+            response_id, error_status, varbinds = _parse_response(response)
+            if response_id != request_id or error_status or not varbinds:
+                break
             
-            # Run in thread pool to avoid blocking
-            loop = asyncio.get_event_loop()
-            return await loop.run_in_executor(None, check_snmp_port)
+            for oid, tag, value in varbinds:
+                if oid[:len(base_oid)] != base_oid or tag == _END_OF_MIB_VIEW:
+                    return rows
+                rows.append((oid, value))
             
-        except Exception:
-            return False
+            # Guard against agents that do not advance
+            if varbinds[-1][0] <= current:
+                break
+            current = varbinds[-1][0]
+        
+        return rows
     
     async def _discover_from_device(self, device_ip: str, network: ipaddress.IPv4Network) -> List[Host]:
-        """Discover hosts from a specific SNMP device - simplified implementation"""
+        """Discover hosts from a device's ipNetToMedia (ARP) table"""
         hosts = []
+        nf = NetworkFilter.for_network(network)
         
         try:
-            # For now, return empty list as SNMP discovery is disabled
-            # This method would need a proper SNMP implementation for Python 3.13
-            logger.info("SNMP discovery from device skipped - implementation disabled", device=device_ip)
+            rows = await self._bulk_walk(device_ip, _IP_NET_TO_MEDIA_PHYS_ADDRESS)
+            
+            for oid, value in rows:
+                # Index is ifIndex.a.b.c.d; the value is the raw MAC address
+                if len(value) != 6 or len(oid) < len(_IP_NET_TO_MEDIA_PHYS_ADDRESS) + 5:
+                    continue
+                ip = '.'.join(map(str, oid[-4:]))
+                if ip not in nf:
+                    continue
+                hosts.append(self._create_host(
+                    ip_address=ip,
+                    mac_address=':'.join(f'{b:02X}' for b in value),
+                    device_type="snmp_arp_entry",
+                    os_info=f"SNMP ARP table of {device_ip}"
+                ))
+            
+            logger.info("SNMP device ARP table walked", 
+                       device=device_ip, 
+                       entries=len(rows), 
+                       hosts_found=len(hosts))
             
         except Exception as e:
             logger.error("SNMP discovery from device failed", device=device_ip, error=str(e))
@@ -19,10 +19,14 @@ from app.services.discovery_methods import (
     mDNSDiscovery,
     ARPDiscovery
 )
+from app.services.discovery_methods.base import BaseDiscoveryMethod, parse_ip
 from app.services.data_quality import HostMerger, DataQualityScorer
 
 logger = structlog.get_logger(__name__)
 
+# Methods whose results count towards early termination
+HIGH_PRIORITY_METHODS = frozenset({'RouterOSAPIDiscovery', 'RouterOSRestDiscovery'})
+
 
 class DiscoveryService:
     """Main discovery service that orchestrates all discovery methods"""
@@ -30,6 +34,11 @@ class DiscoveryService:
     def __init__(self):
         self.running = False
         self.task: Optional[asyncio.Task] = None
+        
+        # Adaptive interval state: back off while the discovered host set is unchanged
+        self._interval = settings.DISCOVERY_INTERVAL
+        self._last_fingerprint: Optional[int] = None
+        self._stable_cycles = 0
         self.discovery_methods = [
             RouterOSAPIDiscovery(),
             RouterOSRestDiscovery(),
@@ -61,13 +70,22 @@ class DiscoveryService:
                 await self.task
             except asyncio.CancelledError:
                 pass
+        
+        # Release pooled connections held by discovery methods
+        for method in self.discovery_methods:
+            try:
+                await method.aclose()
+            except Exception as e:
+                logger.warning("Failed to close discovery method", 
+                             method=method.__class__.__name__, 
+                             error=str(e))
         logger.info("Discovery service stopped")
     
     async def _discovery_loop(self):
         """Main discovery loop"""
         while self.running:
             try:
-                await self.run_discovery()
+                hosts = await self.run_discovery()
                 
                 # Update Redis status if connected
                 if redis_client.redis:
@@ -77,7 +95,7 @@ class DiscoveryService:
                     logger.warning("Redis not connected - skipping status update")
                 
                 # Wait for next interval
-                await asyncio.sleep(settings.DISCOVERY_INTERVAL)
+                await asyncio.sleep(self._next_interval(hosts))
                 
             except asyncio.CancelledError:
                 break
@@ -87,67 +105,107 @@ class DiscoveryService:
                     await redis_client.redis.set("discovery:status", f"error: {str(e)}")
                 await asyncio.sleep(60)  # Wait 1 minute before retry
     
+    def _next_interval(self, hosts: List[Host]) -> int:
+        """Double the sleep interval while hosts stay unchanged, reset it on any change"""
+        fingerprint = hash(frozenset((host.ip_address, host.mac_address) for host in hosts))
+        
+        if fingerprint != self._last_fingerprint:
+            self._last_fingerprint = fingerprint
+            self._stable_cycles = 0
+            self._interval = settings.DISCOVERY_INTERVAL
+            return self._interval
+        
+        self._stable_cycles += 1
+        if self._stable_cycles >= settings.DISCOVERY_BACKOFF_STABLE_CYCLES:
+            max_interval = max(settings.DISCOVERY_MAX_INTERVAL, settings.DISCOVERY_INTERVAL)
+            new_interval = min(self._interval * 2, max_interval)
+            if new_interval != self._interval:
+                logger.info("Network stable - increasing discovery interval", 
+                           stable_cycles=self._stable_cycles, 
+                           interval=new_interval)
+                self._interval = new_interval
+        
+        return self._interval
+    
     async def run_discovery(self) -> List[Host]:
         """Run discovery using all available methods"""
         logger.info("Starting network discovery")
-        discovered_hosts = []
+        # Hosts keyed by IP, merged as each method reports back
+        discovered_hosts: Dict[str, Host] = {}
         
         # Get network range
         try:
             network = ipaddress.ip_network(settings.NETWORK_RANGE, strict=False)
         except ValueError as e:
             logger.error("Invalid network range", error=str(e), range=settings.NETWORK_RANGE)
-            return discovered_hosts
+            return []
         
-        # Try each discovery method in priority order
-        # Stop early if high-priority methods find sufficient hosts (if enabled)
+        # Dispatch methods as concurrent batches: the high-priority RouterOS
+        # methods first, then everything else unless early termination applies
         high_priority_threshold = settings.DISCOVERY_MIN_HOSTS_THRESHOLD
-        high_priority_hosts = 0
+        high_priority_methods = [m for m in self.discovery_methods
+                                 if m.__class__.__name__ in HIGH_PRIORITY_METHODS]
+        other_methods = [m for m in self.discovery_methods
+                         if m.__class__.__name__ not in HIGH_PRIORITY_METHODS]
         
-        for method in self.discovery_methods:
-            try:
-                logger.info("Running discovery method", method=method.__class__.__name__)
-                hosts = await method.discover(network)
-                
-                for host in hosts:
-                    discovered_hosts.append(host)
-                
-                # Check if this is a high-priority method (RouterOS API or REST)
-                if method.__class__.__name__ in ['RouterOSAPIDiscovery', 'RouterOSRestDiscovery']:
-                    high_priority_hosts += len(hosts)
-                
-                logger.info("Discovery method completed", 
-                           method=method.__class__.__name__, 
-                           hosts_found=len(hosts))
-                
-                # Early termination: if we have enough high-priority hosts and total hosts
-                if (settings.DISCOVERY_EARLY_TERMINATION and
-                    high_priority_hosts >= high_priority_threshold and 
-                    len(discovered_hosts) >= high_priority_threshold):
-                    logger.info("Early termination: sufficient high-priority hosts found",
-                               high_priority_hosts=high_priority_hosts,
-                               total_hosts=len(discovered_hosts),
-                               threshold=high_priority_threshold)
-                    break
-                
-            except Exception as e:
+        high_priority_hosts = await self._run_batch(high_priority_methods, network, discovered_hosts)
+        
+        # Early termination: if we have enough high-priority hosts and total hosts
+        if (settings.DISCOVERY_EARLY_TERMINATION and
+            high_priority_hosts >= high_priority_threshold and 
+            len(discovered_hosts) >= high_priority_threshold):
+            logger.info("Early termination: sufficient high-priority hosts found",
+                       high_priority_hosts=high_priority_hosts,
+                       total_hosts=len(discovered_hosts),
+                       threshold=high_priority_threshold)
+        else:
+            await self._run_batch(other_methods, network, discovered_hosts)
+        
+        # Store merged hosts in one pipelined batch
+        merged_hosts = list(discovered_hosts.values())
+        await self._store_hosts(merged_hosts)
+        
+        # Bound the parse cache to a single discovery cycle
+        parse_ip.cache_clear()
+        
+        logger.info("Network discovery completed", total_hosts=len(merged_hosts))
+        return merged_hosts
+    
+    async def _run_batch(self, methods: List[BaseDiscoveryMethod], network: ipaddress.IPv4Network,
+                         discovered_hosts: Dict[str, Host]) -> int:
+        """Run a batch of discovery methods concurrently, merging results by IP; returns the number of new IPs"""
+        # A stuck method is cancelled on timeout instead of holding up the batch
+        tasks = []
+        for method in methods:
+            logger.info("Running discovery method", method=method.__class__.__name__)
+            tasks.append(asyncio.wait_for(method.dispatch(network),
+                                          timeout=settings.DISCOVERY_METHOD_TIMEOUT))
+        
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+        
+        # Hosts reported by several methods count once
+        known_before = len(discovered_hosts)
+        for method, result in zip(methods, results):
+            if isinstance(result, asyncio.TimeoutError):
+                logger.warning("Discovery method timed out", 
+                             method=method.__class__.__name__, 
+                             timeout=settings.DISCOVERY_METHOD_TIMEOUT)
+                continue
+            if isinstance(result, BaseException):
                 logger.error("Discovery method failed", 
                            method=method.__class__.__name__, 
-                           error=str(e))
+                           error=str(result))
                 continue
+            
+            # Quality-aware merge against whatever is already known for the IP
+            for host in result:
+                existing = discovered_hosts.get(host.ip_address)
+                discovered_hosts[host.ip_address] = HostMerger.merge_pair(existing, host) if existing else host
+            logger.info("Discovery method completed", 
+                       method=method.__class__.__name__, 
+                       hosts_found=len(result))
         
-        # Merge hosts with quality-aware logic
-        if discovered_hosts:
-            logger.info("Merging discovered hosts", total_before_merge=len(discovered_hosts))
-            discovered_hosts = HostMerger.merge_hosts(discovered_hosts)
-            logger.info("Host merge completed", total_after_merge=len(discovered_hosts))
-        
-        # Store merged hosts
-        for host in discovered_hosts:
-            await self._store_host(host)
-        
-        logger.info("Network discovery completed", total_hosts=len(discovered_hosts))
-        return discovered_hosts
+        return len(discovered_hosts) - known_before
     
     async def discover_single_host(self, ip_address: str) -> Optional[Host]:
         """Discover a single host using all methods with quality-aware merge"""
@@ -158,26 +216,14 @@ class DiscoveryService:
             logger.error("Invalid IP address", ip=ip_address)
             return None
         
-        discovered_hosts = []
+        discovered_hosts: Dict[str, Host] = {}
+        await self._run_batch(self.discovery_methods, network, discovered_hosts)
         
-        for method in self.discovery_methods:
-            try:
-                hosts = await method.discover(network)
-                discovered_hosts.extend(hosts)
-            except Exception as e:
-                logger.error("Single host discovery failed", 
-                           method=method.__class__.__name__, 
-                           ip=ip_address, 
-                           error=str(e))
-                continue
-        
-        if discovered_hosts:
-            # Merge hosts with quality-aware logic
-            merged_hosts = HostMerger.merge_hosts(discovered_hosts)
-            if merged_hosts:
-                best_host = merged_hosts[0]
-                await self._store_host(best_host)
-                return best_host
+        # Results are already merged per IP; a /32 leaves at most one
+        best_host = next(iter(discovered_hosts.values()), None)
+        if best_host:
+            await self._store_host(best_host)
+            return best_host
         
         return None
     
@@ -202,6 +248,20 @@ class DiscoveryService:
         except Exception as e:
             logger.error("Failed to store host", ip=host.ip_address, error=str(e))
     
+    async def _store_hosts(self, hosts: List[Host]):
+        """Store many hosts in Redis with quality-aware merge, batched into pipelines"""
+        if not hosts:
+            return
+        if not redis_client.redis:
+            logger.warning("Redis not connected - skipping host storage", count=len(hosts))
+            return
+        
+        last_seen = datetime.now().isoformat()
+        stored = await redis_client.merge_hosts_bulk(
+            [{**host.dict(), "last_seen": last_seen} for host in hosts]
+        )
+        logger.debug("Hosts stored/merged", total=len(hosts), changed=stored)
+    
     async def get_discovery_status(self) -> Dict[str, Any]:
         """Get discovery service status"""
         return await redis_client.get_discovery_status()
@@ -0,0 +1,45 @@
+"""
+Specialized IPv4 network membership predicates
+"""
+
+import ipaddress
+import socket
+import struct
+from typing import Callable
+
+_unpack_ip = struct.Struct("!I").unpack
+
+
+def compile_predicate(network: ipaddress.IPv4Network) -> Callable[[str], bool]:
+    """Build a membership test for IP strings, specialized for one network"""
+    net_mask = int(network.netmask)
+    net_prefix = int(network.network_address)
+    inet_pton = socket.inet_pton
+    af_inet = socket.AF_INET
+    
+    def contains(ip: str) -> bool:
+        try:
+            return (_unpack_ip(inet_pton(af_inet, ip))[0] & net_mask) == net_prefix
+        except OSError:
+            # Not a dotted quad; ipaddress raises ValueError for garbage
+            return ipaddress.ip_address(ip) in network
+    
+    if network.prefixlen != 24:
+        return contains
+    
+    # A /24 is a fixed dotted prefix; only the last octet needs checking
+    prefix = str(network.network_address).rsplit('.', 1)[0] + '.'
+    prefix_len = len(prefix)
+    
+    def contains_24(ip: str) -> bool:
+        if not ip.startswith(prefix):
+            return False
+        octet = ip[prefix_len:]
+        # Canonical ASCII octets only; leading zeros, non-ASCII digits and
+        # out-of-range values take the general path so both agree on them
+        if (octet.isascii() and octet.isdigit() and len(octet) <= 3
+                and (octet[0] != '0' or octet == '0') and int(octet) <= 255):
+            return True
+        return contains(ip)
+    
+    return contains_24
@@ -2,17 +2,46 @@
 Wake-on-LAN service for WOLManager
 """
 
+import asyncio
 import socket
 import struct
-from typing import Optional, Dict, Any
+import time
+from functools import lru_cache
+from typing import Optional, Dict, Any, Tuple
 import structlog
 
 from app.core.config import settings
 from app.core.redis_client import redis_client
-from app.models.host import WOLRequest, WOLResponse
+from app.models.host import WOLRequest, WOLResponse, parse_mac
 
 logger = structlog.get_logger(__name__)
 
+# Magic packet preamble
+_PREAMBLE = b'\xff\xff\xff\xff\xff\xff'
+
+# Upper bound on remembered IP -> MAC lookups
+_MAC_CACHE_SIZE = 1024
+
+# Upper bound on connected transports kept open for distinct broadcast addresses
+_MAX_BROADCAST_TRANSPORTS = 16
+
+
+@lru_cache(maxsize=256)
+def _build_wol_packet(mac_address: str) -> Optional[bytes]:
+    """Validate a MAC and build its magic packet (6 bytes of 0xFF + 16 repetitions of the MAC), or None if invalid"""
+    mac_bytes = parse_mac(mac_address)
+    if mac_bytes is None:
+        return None
+    return _PREAMBLE + mac_bytes * 16
+
+
+class _WOLProtocol(asyncio.DatagramProtocol):
+    """Send-only protocol for the broadcast transport"""
+    
+    def error_received(self, exc):
+        # Send errors on a datagram transport surface here rather than from sendto()
+        logger.error("WOL broadcast socket error", error=str(exc))
+
 
 class WOLService:
     """Wake-on-LAN service"""
@@ -20,19 +49,60 @@ class WOLService:
     def __init__(self):
         self.broadcast_address = settings.WOL_BROADCAST_ADDRESS
         self.port = settings.WOL_PORT
+        
+        # Non-blocking transports connected to each broadcast address, opened on first use inside the event loop
+        self._transports: Dict[str, asyncio.DatagramTransport] = {}
+        self._transport_lock: Optional[asyncio.Lock] = None
+        
+        # Recent IP -> (expiry, MAC) lookups so repeated wakes of a host skip Redis
+        self._mac_cache: Dict[str, Tuple[float, str]] = {}
+    
+    async def _open_transport(self, broadcast_address: str) -> asyncio.DatagramTransport:
+        """Open the transport connected to a broadcast address unless another request already has"""
+        if self._transport_lock is None:
+            self._transport_lock = asyncio.Lock()
+        async with self._transport_lock:
+            transport = self._transports.get(broadcast_address)
+            if transport is None or transport.is_closing():
+                if len(self._transports) >= _MAX_BROADCAST_TRANSPORTS and broadcast_address not in self._transports:
+                    # Close the oldest connection
+                    self._drop_transport(next(iter(self._transports)))
+                
+                # Connecting fixes the destination once, so each packet is a plain send()
+                loop = asyncio.get_running_loop()
+                transport, _ = await loop.create_datagram_endpoint(
+                    _WOLProtocol,
+                    remote_addr=(broadcast_address, self.port),
+                    family=socket.AF_INET,
+                    allow_broadcast=True
+                )
+                self._transports[broadcast_address] = transport
+        return transport
+    
+    def _drop_transport(self, broadcast_address: str):
+        """Close and forget the transport for one broadcast address"""
+        transport = self._transports.pop(broadcast_address, None)
+        if transport is not None:
+            transport.close()
+    
+    def close(self):
+        """Close all broadcast transports"""
+        for broadcast_address in list(self._transports):
+            self._drop_transport(broadcast_address)
     
     async def send_wol_packet(self, request: WOLRequest) -> WOLResponse:
         """Send Wake-on-LAN packet to wake a host"""
         try:
-            # Get MAC address from request or lookup from database
+            # Get MAC address from request (already canonical) or lookup from database
             mac_address = request.mac_address
             
-            if not mac_address:
+            if mac_address:
+                # Supplied MACs never touch Redis; drop anything remembered for this IP
+                self._mac_cache.pop(request.ip_address, None)
+            else:
                 # Try to get MAC address from stored host data
-                host_data = await redis_client.get_host(request.ip_address)
-                if host_data and host_data.get('mac_address'):
-                    mac_address = host_data['mac_address']
-                else:
+                mac_address = await self._lookup_mac(request.ip_address)
+                if not mac_address:
                     return WOLResponse(
                         success=False,
                         message="MAC address not provided and not found in database",
@@ -40,8 +110,9 @@ class WOLService:
                         mac_address=None
                     )
             
-            # Validate MAC address format
-            if not self._is_valid_mac(mac_address):
+            # Validate the MAC and build its packet in one cached step
+            wol_packet = _build_wol_packet(mac_address)
+            if wol_packet is None:
                 return WOLResponse(
                     success=False,
                     message="Invalid MAC address format",
@@ -52,7 +123,9 @@ class WOLService:
             # Create and send WOL packet
             success = await self._send_wol_packet(
                 mac_address, 
-                request.broadcast_address or self.broadcast_address
+                wol_packet, 
+                request.broadcast_address or self.broadcast_address,
+                repeat=request.repeat
             )
             
             if success:
@@ -84,67 +157,73 @@ class WOLService:
                 mac_address=request.mac_address
             )
     
-    async def _send_wol_packet(self, mac_address: str, broadcast_address: str) -> bool:
-        """Send the actual WOL packet"""
+    async def _lookup_mac(self, ip_address: str) -> Optional[str]:
+        """Get a host's stored MAC address, reusing recent lookups for WOL_MAC_CACHE_TTL seconds"""
+        now = time.monotonic()
+        cached = self._mac_cache.get(ip_address)
+        if cached and cached[0] > now:
+            return cached[1]
+        
+        host_data = await redis_client.get_host(ip_address)
+        mac_address = host_data.get('mac_address') if host_data else None
+        if not mac_address:
+            self._mac_cache.pop(ip_address, None)
+            return None
+        
+        if len(self._mac_cache) >= _MAC_CACHE_SIZE and ip_address not in self._mac_cache:
+            # Evict the oldest entry
+            self._mac_cache.pop(next(iter(self._mac_cache)))
+        self._mac_cache[ip_address] = (now + settings.WOL_MAC_CACHE_TTL, mac_address)
+        return mac_address
+    
+    async def _send_wol_packet(self, mac_address: str, wol_packet: bytes, broadcast_address: str,
+                               repeat: int = 1) -> bool:
+        """Send the actual WOL packet, repeat times back to back"""
         try:
-            # Convert MAC address to bytes
-            mac_bytes = self._mac_to_bytes(mac_address)
-            
-            # Create WOL packet: 6 bytes of 0xFF + 16 repetitions of MAC address
-            wol_packet = b'\xff' * 6 + mac_bytes * 16
-            
-            # Create UDP socket
-            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-            sock.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
-            
-            try:
-                # Send packet
-                sock.sendto(wol_packet, (broadcast_address, self.port))
-                return True
-            finally:
-                sock.close()
+            # Already-open transports are used without awaiting anything
+            transport = self._transports.get(broadcast_address)
+            if transport is None or transport.is_closing():
+                transport = await self._open_transport(broadcast_address)
+            for _ in range(repeat):
+                transport.sendto(wol_packet)
+            return True
                 
         except Exception as e:
+            if isinstance(e, OSError):
+                # Drop a transport that may be broken so the next send opens a fresh one
+                self._drop_transport(broadcast_address)
             logger.error("WOL packet creation/send failed", 
                         mac=mac_address, 
                         broadcast=broadcast_address, 
                         error=str(e))
             return False
     
-    def _mac_to_bytes(self, mac_address: str) -> bytes:
-        """Convert MAC address string to bytes"""
-        # Remove separators and convert to bytes
-        mac_clean = mac_address.replace(':', '').replace('-', '')
-        return bytes.fromhex(mac_clean)
-    
-    def _is_valid_mac(self, mac_address: str) -> bool:
-        """Validate MAC address format"""
-        import re
-        
-        # Allow various MAC address formats
-        patterns = [
-            r'^[0-9a-fA-F]{2}:[0-9a-fA-F]{2}:[0-9a-fA-F]{2}:[0-9a-fA-F]{2}:[0-9a-fA-F]{2}:[0-9a-fA-F]{2}$',
-            r'^[0-9a-fA-F]{2}-[0-9a-fA-F]{2}-[0-9a-fA-F]{2}-[0-9a-fA-F]{2}-[0-9a-fA-F]{2}-[0-9a-fA-F]{2}$',
-            r'^[0-9a-fA-F]{12}$'
-        ]
-        
-        return any(re.match(pattern, mac_address) for pattern in patterns)
-    
     async def wake_host(self, ip_address: str, mac_address: Optional[str] = None) -> WOLResponse:
         """Convenience method to wake a host by IP"""
-        request = WOLRequest(
-            ip_address=ip_address,
-            mac_address=mac_address
-        )
-        return await self.send_wol_packet(request)
+        return await self._wake(ip_address, mac_address)
     
     async def wake_host_by_mac(self, mac_address: str, broadcast_address: Optional[str] = None) -> WOLResponse:
         """Convenience method to wake a host by MAC address only"""
-        request = WOLRequest(
-            ip_address="unknown",  # Not needed for MAC-only wake
-            mac_address=mac_address,
-            broadcast_address=broadcast_address
-        )
+        return await self._wake("unknown", mac_address, broadcast_address)  # IP not needed for MAC-only wake
+    
+    async def _wake(self, ip_address: str, mac_address: Optional[str],
+                    broadcast_address: Optional[str] = None) -> WOLResponse:
+        """Build a WOLRequest and send it, answering a malformed MAC with a failed response"""
+        try:
+            request = WOLRequest(
+                ip_address=ip_address,
+                mac_address=mac_address,
+                broadcast_address=broadcast_address
+            )
+        except ValueError:
+            # WOLRequest canonicalizes the MAC and rejects malformed ones
+            return WOLResponse(
+                success=False,
+                message="Invalid MAC address format",
+                ip_address=ip_address,
+                mac_address=mac_address
+            )
         return await self.send_wol_packet(request)
 
-
+# Global WOL service instance
+wol_service = WOLService()
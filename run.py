@@ -13,6 +13,7 @@ if __name__ == "__main__":
         port=settings.PORT,
         reload=settings.DEBUG,
         log_level="info" if not settings.DEBUG else "debug",
+        loop="auto",  # uvloop when installed (uvicorn[standard]), asyncio otherwise
         access_log=False
     )
 
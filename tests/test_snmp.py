@@ -0,0 +1,161 @@
+"""
+Tests for the minimal SNMPv2c client used by SNMP discovery
+"""
+
+import asyncio
+import ipaddress
+
+from app.services.discovery_methods.snmp import (
+    SNMPDiscovery,
+    _END_OF_MIB_VIEW,
+    _GET_BULK_REQUEST,
+    _IP_NET_TO_MEDIA_PHYS_ADDRESS,
+    _ber,
+    _ber_int,
+    _ber_read,
+    _build_request,
+    _decode_oid,
+    _encode_oid,
+    _parse_response,
+)
+
+_GET_RESPONSE = 0xA2
+_OCTET_STRING = 0x04
+
+
+def _arp_oid(if_index, ip):
+    """ipNetToMediaPhysAddress.<ifIndex>.<a.b.c.d>"""
+    return _IP_NET_TO_MEDIA_PHYS_ADDRESS + (if_index,) + tuple(int(o) for o in ip.split('.'))
+
+
+def _response(request_id, varbinds, error_status=0):
+    """Build an SNMPv2c GetResponse carrying (oid, tag, value) varbinds"""
+    varbind_list = b''.join(_ber(0x30, _encode_oid(oid) + _ber(tag, value)) for oid, tag, value in varbinds)
+    pdu = _ber(_GET_RESPONSE,
+               _ber_int(request_id)
+               + _ber_int(error_status)
+               + _ber_int(0)
+               + _ber(0x30, varbind_list))
+    return _ber(0x30, b'\x02\x01\x01' + _ber(0x04, b'public') + pdu)
+
+
+class _FakeAgent:
+    """Stand-in for SNMPDiscovery._request answering each GETBULK from a list of canned varbind pages"""
+    
+    def __init__(self, pages):
+        self.pages = list(pages)
+        self.requested = []
+    
+    async def __call__(self, ip, packet, request_id):
+        # Requests share the response layout apart from the PDU tag
+        _, _, varbinds = _parse_response(packet)
+        self.requested.append(varbinds[0][0])
+        if not self.pages:
+            return None
+        return _response(request_id, self.pages.pop(0))
+
+
+def _discovery_with(agent):
+    discovery = SNMPDiscovery()
+    discovery._request = agent
+    return discovery
+
+
+def test_oid_round_trip():
+    for oid in [
+        (1, 3, 6, 1, 2, 1, 1, 1, 0),
+        _arp_oid(2, '192.168.1.200'),
+        (1, 3, 6, 1, 4, 1, 14988, 1, 1, 3, 100),   # arcs needing two base-128 bytes
+        (2, 25, 2 ** 32, 0),                        # large first and later arcs
+    ]:
+        tag, start, end = _ber_read(_encode_oid(oid), 0)
+        assert tag == 0x06
+        assert _decode_oid(_encode_oid(oid)[start:end]) == oid
+
+
+def test_request_id_uses_minimal_integer_encoding():
+    packet = _build_request(b'public', 5, _GET_BULK_REQUEST, _IP_NET_TO_MEDIA_PHYS_ADDRESS,
+                            max_repetitions=50)
+    assert b'\x02\x01\x05\x02\x01\x00\x02\x01\x32' in packet
+
+
+def test_parse_getbulk_response_with_several_varbinds():
+    rows = [
+        (_arp_oid(1, '192.168.1.10'), _OCTET_STRING, bytes.fromhex('001122334455')),
+        (_arp_oid(1, '192.168.1.11'), _OCTET_STRING, bytes.fromhex('66778899aabb')),
+        (_arp_oid(2, '10.0.0.1'), _OCTET_STRING, bytes.fromhex('ccddeeff0011')),
+    ]
+    # Long enough to need a multi-byte BER length on the outer sequences
+    rows += [(_arp_oid(3, f'172.16.0.{i}'), _OCTET_STRING, bytes(6)) for i in range(1, 20)]
+    
+    request_id, error_status, varbinds = _parse_response(_response(0x1234ABCD, rows))
+    
+    assert request_id == 0x1234ABCD
+    assert error_status == 0
+    assert varbinds == rows
+
+
+def test_bulk_walk_follows_pages_and_stops_outside_subtree():
+    page_1 = [(_arp_oid(1, f'192.168.1.{i}'), _OCTET_STRING, bytes([0, 0, 0, 0, 0, i])) for i in range(1, 4)]
+    page_2 = [
+        (_arp_oid(1, '192.168.1.4'), _OCTET_STRING, bytes(6)),
+        # Next column (ipNetToMediaNetAddress): outside the walked subtree
+        ((1, 3, 6, 1, 2, 1, 4, 22, 1, 3, 1, 192, 168, 1, 1), 0x40, bytes([192, 168, 1, 1])),
+        (_arp_oid(1, '192.168.1.5'), _OCTET_STRING, bytes(6)),
+    ]
+    agent = _FakeAgent([page_1, page_2, page_1])
+    discovery = _discovery_with(agent)
+    
+    rows = asyncio.run(discovery._bulk_walk('192.168.1.1', _IP_NET_TO_MEDIA_PHYS_ADDRESS))
+    
+    assert [oid for oid, _ in rows] == [oid for oid, _, _ in page_1] + [_arp_oid(1, '192.168.1.4')]
+    # Second round continues from the last OID of the first page; no third round
+    assert agent.requested == [_IP_NET_TO_MEDIA_PHYS_ADDRESS, page_1[-1][0]]
+
+
+def test_bulk_walk_stops_on_end_of_mib_view():
+    page = [
+        (_arp_oid(1, '192.168.1.7'), _OCTET_STRING, bytes(6)),
+        (_arp_oid(1, '192.168.1.7') + (0,), _END_OF_MIB_VIEW, b''),
+    ]
+    agent = _FakeAgent([page, page])
+    discovery = _discovery_with(agent)
+    
+    rows = asyncio.run(discovery._bulk_walk('192.168.1.1', _IP_NET_TO_MEDIA_PHYS_ADDRESS))
+    
+    assert rows == [(_arp_oid(1, '192.168.1.7'), bytes(6))]
+    assert len(agent.requested) == 1
+
+
+def test_bulk_walk_stops_when_device_goes_quiet():
+    page = [(_arp_oid(1, '192.168.1.8'), _OCTET_STRING, bytes(6))]
+    agent = _FakeAgent([page])
+    discovery = _discovery_with(agent)
+    
+    rows = asyncio.run(discovery._bulk_walk('192.168.1.1', _IP_NET_TO_MEDIA_PHYS_ADDRESS))
+    
+    assert rows == [(_arp_oid(1, '192.168.1.8'), bytes(6))]
+    assert len(agent.requested) == 2
+
+
+def test_discover_from_device_builds_arp_entry_hosts():
+    page = [
+        (_arp_oid(1, '192.168.1.20'), _OCTET_STRING, bytes.fromhex('a1b2c3d4e5f6')),
+        (_arp_oid(1, '10.0.0.5'), _OCTET_STRING, bytes.fromhex('000000000001')),    # other network
+        (_arp_oid(1, '192.168.1.21'), _OCTET_STRING, bytes.fromhex('0a0b')),        # not a MAC
+        (_arp_oid(2, '192.168.1.22'), _OCTET_STRING, bytes.fromhex('00e04c680001')),
+        (_arp_oid(2, '192.168.1.22') + (0,), _END_OF_MIB_VIEW, b''),
+    ]
+    discovery = _discovery_with(_FakeAgent([page]))
+    
+    hosts = asyncio.run(discovery._discover_from_device('192.168.1.1', ipaddress.ip_network('192.168.1.0/24')))
+    
+    assert [(h.ip_address, h.mac_address) for h in hosts] == [
+        ('192.168.1.20', 'A1:B2:C3:D4:E5:F6'),
+        ('192.168.1.22', '00:E0:4C:68:00:01'),
+    ]
+    for host in hosts:
+        assert host.device_type == "snmp_arp_entry"
+        assert host.discovery_method == "snmp"
+        assert host.os_info == "SNMP ARP table of 192.168.1.1"
+        assert host.wol_enabled is False